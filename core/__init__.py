@@ -2,6 +2,7 @@
 Core模块包初始化文件
 
 导出所有核心处理器和工具函数，提供统一的导入接口。
+处理器类按需导入：首次访问 core.ApiHandler 等属性时才加载对应模块及其SDK依赖。
 
 Author: Qasim
 Version: 2.0
@@ -9,20 +10,71 @@ Python: 3.11+
 Date: 2025-01-14
 """
 
-from core.api_handler import ApiHandler
-from core.db_handler import DatabaseHandler
+import importlib
+from typing import TYPE_CHECKING, Any
+
+from core.fixer import replay_failed_ids
+from core.handlers import (
+    clear_handlers,
+    get_api_handler,
+    get_database_handler,
+    get_oss_handler,
+    get_s3_handler,
+    get_site_handler,
+)
 from core.logger_handler import setup_logger
-from core.oss_handler import OSSHandler
-from core.s3_handler import S3Handler
-from core.site_handler import SiteHandler
 from core.util_handler import (
     BASE_DIR,
+    StateFlusher,
     is_ffmpeg_installed,
     load_config,
     load_state,
     save_state,
 )
 
+if TYPE_CHECKING:
+    from core.api_handler import ApiHandler
+    from core.db_handler import DatabaseHandler
+    from core.oss_handler import OSSHandler
+    from core.s3_handler import S3Handler
+    from core.site_handler import SiteHandler
+
+# ============================================================================
+# 按需导入的处理器类
+# ============================================================================
+
+# 导出名称 -> 所在模块
+_LAZY_EXPORTS: dict[str, str] = {
+    'ApiHandler': 'core.api_handler',
+    'DatabaseHandler': 'core.db_handler',
+    'OSSHandler': 'core.oss_handler',
+    'S3Handler': 'core.s3_handler',
+    'SiteHandler': 'core.site_handler',
+}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    首次访问处理器类时导入其模块并缓存到包命名空间
+    
+    Args:
+        name: 属性名称
+    
+    Returns:
+        Any: 对应的处理器类
+    
+    Raises:
+        AttributeError: 名称不在导出列表中
+    """
+    module_name: str | None = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value: Any = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
 # ============================================================================
 # 公共导出
 # ============================================================================
@@ -34,11 +86,21 @@ __all__: list[str] = [
     'OSSHandler',
     'S3Handler',
     'SiteHandler',
+    # 处理器获取函数
+    'get_api_handler',
+    'get_database_handler',
+    'get_oss_handler',
+    'get_s3_handler',
+    'get_site_handler',
+    'clear_handlers',
+    # 修复任务
+    'replay_failed_ids',
     # 工具函数
     'setup_logger',
     'load_config',
     'load_state',
     'save_state',
+    'StateFlusher',
     'is_ffmpeg_installed',
     # 常量
     'BASE_DIR',
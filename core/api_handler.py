@@ -9,16 +9,24 @@ Python: 3.11+
 Date: 2025-01-14
 """
 
-import json
 import logging
 import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser, SectionProxy
 from typing import Any
 
+import orjson
 import requests
 from requests.adapters import HTTPAdapter
 from requests.sessions import Session
-from urllib3.util.retry import Retry
+
+from core.http_handler import KeepAliveHTTPAdapter
+from core.ratelimit import TokenBucket
 
 # ============================================================================
 # 模块级日志记录器
@@ -27,6 +35,23 @@ from urllib3.util.retry import Retry
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+# ============================================================================
+# 常量定义
+# ============================================================================
+
+# HTTP连接池默认大小（并发请求数不应超过该值，可通过 [api] pool_maxsize 调整）
+POOL_MAXSIZE: int = 20
+
+# 应用层重试配置（指数退避 + 随机抖动）
+RETRY_MAX_RETRIES: int = 3
+RETRY_BASE_DELAY: float = 1.0
+RETRY_MAX_DELAY: float = 30.0
+RETRY_JITTER: float = 0.5
+
+# 视频详情缓存容量上限
+DETAIL_CACHE_MAXSIZE: int = 10000
+
+
 # ============================================================================
 # API处理器类
 # ============================================================================
@@ -39,9 +64,9 @@ class ApiHandler:
     
     Main Features:
         - 用户登录和Token管理
-        - 视频列表分页获取
-        - 视频详情信息获取
-        - 自动重试和错误处理
+        - 视频列表分页获取（支持多页并发预取）
+        - 视频详情信息获取（带TTL的LRU缓存）
+        - 指数退避重试和Token过期自动重新登录
         - 连接池优化
     
     Attributes:
@@ -62,10 +87,10 @@ class ApiHandler:
     Example:
         >>> from core import ApiHandler, load_config
         >>> config = load_config()
-        >>> api = ApiHandler(config=config)
-        >>> token = api.login()
-        >>> if token:
-        ...     videos = api.fetch_video_page(page_number=1)
+        >>> with ApiHandler(config=config) as api:
+        ...     token = api.login()
+        ...     if token:
+        ...         videos = api.fetch_video_page(page_number=1)
     """
     
     def __init__(self, config: ConfigParser) -> None:
@@ -96,6 +121,12 @@ class ApiHandler:
         self.domain: str = api_config.get('domain', fallback='')
         self.token: str | None = None
         
+        # Token有效期管理：在过期前 token_refresh_margin 秒主动刷新
+        self._token_ttl: int = api_config.getint('token_ttl', fallback=3600)
+        self._token_refresh_margin: int = api_config.getint('token_refresh_margin', fallback=60)
+        self._token_issued_at: float = 0.0
+        self._token_lock: threading.Lock = threading.Lock()
+        
         # 请求头配置
         self.referer: str = api_config.get('referer', fallback='')
         self.origin: str = api_config.get('origin', fallback='')
@@ -108,8 +139,27 @@ class ApiHandler:
         # SSL配置
         self.verify_ssl: bool = api_config.getboolean('verify_ssl', fallback=True)
         
+        # 连接池大小：所有并发线程共享同一会话，并发数超过连接池时多余连接用完即被丢弃
+        self.pool_maxsize: int = max(1, api_config.getint('pool_maxsize', fallback=POOL_MAXSIZE))
+        
+        # 请求限流：列表与详情接口各自一个令牌桶，所有线程共享（rate_limit <= 0 表示不限流）
+        rate_limit: float = api_config.getfloat('rate_limit', fallback=5.0)
+        rate_burst: int = api_config.getint('rate_burst', fallback=10)
+        self._page_bucket: TokenBucket = TokenBucket(rate_per_sec=rate_limit, burst=rate_burst)
+        self._detail_bucket: TokenBucket = TokenBucket(rate_per_sec=rate_limit, burst=rate_burst)
+        
+        # 视频详情缓存: douban_id -> (写入时间, 详情)
+        self._detail_cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._detail_cache_ttl: int = api_config.getint('detail_cache_ttl', fallback=300)
+        self._detail_cache_lock: threading.Lock = threading.Lock()
+        
+        # 预生成请求头（仅在Token变化时重建）
+        self._headers_no_token: dict[str, str] = self._default_headers(with_token=False)
+        self._headers_with_token: dict[str, str] = self._default_headers(with_token=True)
+        
         # 初始化HTTP会话
         self.session: Session = self._setup_session()
+        self._closed: bool = False
         
         logger.info("API处理器初始化完成")
     
@@ -123,25 +173,19 @@ class ApiHandler:
             Session: 配置好的requests会话对象
             
         Note:
-            - 连接池大小: 20
-            - 重试次数: 3次（手动控制）
-            - 重试状态码: 429, 500, 502, 503, 504
+            - 连接池大小: pool_maxsize
+            - TCP Keep-Alive: 已启用
+            - 适配器层不重试（max_retries=0），重试统一由 _retry 负责，
+              避免两层重试叠加放大请求数，并保证每次重试都经过令牌桶限流
+            - 429/5xx 由 raise_for_status 抛出并交给 _retry 处理（遵循 Retry-After）
         """
         session: Session = requests.Session()
         
-        # 配置重试策略
-        retry_strategy: Retry = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
-        )
-        
-        # 配置HTTP适配器
-        adapter: HTTPAdapter = HTTPAdapter(
-            pool_connections=20,
-            pool_maxsize=20,
-            max_retries=retry_strategy
+        # 配置HTTP适配器（启用TCP Keep-Alive，重试交由 _retry 统一处理）
+        adapter: HTTPAdapter = KeepAliveHTTPAdapter(
+            pool_connections=self.pool_maxsize,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0
         )
         
         session.mount(prefix='http://', adapter=adapter)
@@ -176,6 +220,153 @@ class ApiHandler:
         
         return headers
     
+    def _parse_response(self, response: requests.Response) -> dict[str, Any]:
+        """
+        使用orjson解析响应体
+        
+        直接解析原始字节，跳过requests内部的文本解码和标准库json。
+        
+        Args:
+            response: HTTP响应对象
+            
+        Returns:
+            dict[str, Any]: 解析后的JSON数据
+            
+        Raises:
+            orjson.JSONDecodeError: 响应体不是合法JSON时抛出
+        """
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            logger.error(f"响应JSON解析失败: {response.text[:500]}")
+            raise
+    
+    def _retry(
+        self,
+        fn: Callable[[], dict[str, Any]],
+        max_retries: int = RETRY_MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        jitter: float = RETRY_JITTER,
+        relogin: bool = True
+    ) -> dict[str, Any] | None:
+        """
+        带指数退避和随机抖动的请求重试
+        
+        这是唯一的重试层（HTTP适配器不重试），统一处理网络异常、
+        429/5xx 等HTTP错误状态、JSON层面的Token过期（code == 402）
+        以及其他 code != 0 的临时性错误。服务端返回 Retry-After 时
+        以其作为退避下限（不超过 max_delay）。
+        
+        Args:
+            fn: 执行一次请求并返回解析后JSON的可调用对象
+            max_retries: 最大重试次数
+            base_delay: 退避基础延迟（秒）
+            max_delay: 单次退避上限（秒）
+            jitter: 抖动系数，实际延迟为 delay * (1 + random() * jitter)
+            relogin: 遇到402时是否重新登录后重试
+            
+        Returns:
+            dict[str, Any] | None: 最后一次请求的响应数据，全部因网络异常失败时返回None
+        """
+        data: dict[str, Any] | None = None
+        
+        for attempt in range(max_retries + 1):
+            used_token: str | None = self.token
+            retry_after: float = 0.0
+            try:
+                data = fn()
+            except (requests.RequestException, orjson.JSONDecodeError) as e:
+                logger.warning(f"请求失败 (第 {attempt + 1} 次): {e}")
+                data = None
+                if isinstance(e, requests.HTTPError) and e.response is not None:
+                    retry_after = self._retry_after(response=e.response)
+            else:
+                code: Any = data.get('code')
+                if code == 0:
+                    return data
+                
+                if code == 402:
+                    # Token过期：重新登录后立即重试，无需退避
+                    if relogin and attempt < max_retries:
+                        logger.warning("Token已过期，重新登录后重试")
+                        if self.refresh_token_if_stale(stale_token=used_token):
+                            continue
+                    return data
+                
+                logger.warning(f"API返回错误 (第 {attempt + 1} 次): {data.get('msg', '未知错误')}")
+            
+            if attempt < max_retries:
+                delay: float = min(max_delay, base_delay * (2 ** attempt)) * (1 + random.random() * jitter)
+                delay = max(delay, min(max_delay, retry_after))
+                logger.debug("%.2f 秒后重试", delay)
+                time.sleep(delay)
+        
+        return data
+    
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """
+        解析响应的 Retry-After 头（秒数形式）
+        
+        Args:
+            response: HTTP响应对象
+            
+        Returns:
+            float: 建议等待的秒数，缺失或无法解析时返回0
+        """
+        value: str | None = response.headers.get('Retry-After')
+        if not value:
+            return 0.0
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return 0.0
+    
+    def _token_expiring(self) -> bool:
+        """
+        判断Token是否缺失或即将过期
+        
+        Returns:
+            bool: 需要刷新时返回True
+        """
+        if not self.token:
+            return True
+        age: float = time.monotonic() - self._token_issued_at
+        return age > self._token_ttl - self._token_refresh_margin
+    
+    def _ensure_token(self) -> None:
+        """
+        在Token过期前主动刷新
+        
+        避免请求因402失败后再重试；加锁保证并发线程只登录一次。
+        """
+        if not self._token_expiring():
+            return
+        
+        with self._token_lock:
+            if self._token_expiring():
+                logger.info("Token缺失或即将过期，主动刷新")
+                self.login()
+    
+    def refresh_token_if_stale(self, stale_token: str | None) -> bool:
+        """
+        收到402后重新登录
+        
+        若其他线程已在此期间刷新了Token，则直接复用，不再重复登录；
+        并发线程遇到同一个过期Token时只会登录一次。
+        
+        Args:
+            stale_token: 收到402的请求所使用的Token
+            
+        Returns:
+            bool: 当前持有可用的新Token时返回True
+        """
+        with self._token_lock:
+            if self.token and self.token != stale_token:
+                return True
+            return self.login() is not None
+    
     def set_token(self, token: str) -> None:
         """
         设置当前会话使用的API Token
@@ -187,7 +378,9 @@ class ApiHandler:
             >>> api.set_token(token="your_token_here")
         """
         self.token = token
-        logger.debug(f"Token已更新: {token[:20]}...")
+        self._token_issued_at = time.monotonic()
+        self._headers_with_token = self._default_headers(with_token=True)
+        logger.debug("Token已更新: %.20s...", token)
     
     def login(self) -> str | None:
         """
@@ -208,39 +401,39 @@ class ApiHandler:
         """
         logger.info("开始登录以获取新Token...")
         
-        # 构建登录请求载荷
-        payload: dict[str, str] = {
+        # 构建登录请求载荷（序列化一次，重试时复用）
+        body: bytes = orjson.dumps({
             "user_name": self.username,
             "password": self.password,
             "domain": self.domain
-        }
-        
-        headers: dict[str, str] = self._default_headers(with_token=False)
+        })
         
-        try:
+        def _request() -> dict[str, Any]:
             response: requests.Response = self.session.post(
                 url=self.login_url,
-                data=json.dumps(payload),
-                headers=headers,
+                data=body,
+                headers=self._headers_no_token,
                 timeout=(self.connection_timeout, self.read_timeout),
                 verify=self.verify_ssl
             )
             response.raise_for_status()
-            data: dict[str, Any] = response.json()
-            
-            # 解析响应数据
-            if data.get('code') == 0 and 'data' in data and 'token' in data['data']:
-                new_token: str = data['data']['token']
-                self.set_token(token=new_token)
-                logger.info("登录成功，Token已更新")
-                return new_token
-            else:
-                error_msg: str = data.get('msg', '未知错误')
-                logger.error(f"登录失败: {error_msg}")
-                return None
-                
-        except requests.RequestException as e:
-            logger.error(f"登录请求失败: {e}")
+            return self._parse_response(response=response)
+        
+        data: dict[str, Any] | None = self._retry(fn=_request, relogin=False)
+        
+        if data is None:
+            logger.error("登录请求失败")
+            return None
+        
+        # 解析响应数据
+        if data.get('code') == 0 and 'data' in data and 'token' in data['data']:
+            new_token: str = data['data']['token']
+            self.set_token(token=new_token)
+            logger.info("登录成功，Token已更新")
+            return new_token
+        else:
+            error_msg: str = data.get('msg', '未知错误')
+            logger.error(f"登录失败: {error_msg}")
             return None
     
     def fetch_video_page(self, page_number: int) -> dict[str, Any] | None:
@@ -275,53 +468,137 @@ class ApiHandler:
             ...     videos = result.get('data', [])
         """
         # 检查Token
+        self._ensure_token()
         if not self.token:
             logger.error("Token未设置，无法获取视频列表")
             return {"code": 402, "data": []}
         
-        # 构建请求载荷
-        payload: dict[str, int] = {
+        # 构建请求载荷（序列化一次，重试时复用）
+        body: bytes = orjson.dumps({
             "page": page_number,
             "page_size": self.page_size
-        }
-        
-        headers: dict[str, str] = self._default_headers(with_token=True)
+        })
         
-        try:
-            logger.info(f"正在请求第 {page_number} 页的视频列表...")
-            
+        def _request() -> dict[str, Any]:
+            # 每次请求读取最新请求头，确保重新登录后使用新Token
+            # 流式读取：响应体一次性读入连续字节后直接交给orjson，并立即释放连接
+            self._page_bucket.acquire()
             response: requests.Response = self.session.post(
                 url=self.video_list_url,
-                data=json.dumps(payload),
-                headers=headers,
+                data=body,
+                headers=self._headers_with_token,
                 timeout=(self.connection_timeout, self.read_timeout),
-                verify=self.verify_ssl
+                verify=self.verify_ssl,
+                stream=True
             )
-            response.raise_for_status()
-            data: dict[str, Any] = response.json()
-            
-            # 处理响应
-            if data.get('code') == 0:
+            try:
+                response.raise_for_status()
+                return self._parse_response(response=response)
+            finally:
+                response.close()
+        
+        logger.info("正在请求第 %s 页的视频列表...", page_number)
+        data: dict[str, Any] | None = self._retry(fn=_request)
+        
+        if data is None:
+            logger.error(f"请求视频列表失败 (页码: {page_number})")
+            return None
+        
+        # 处理响应
+        if data.get('code') == 0:
+            if logger.isEnabledFor(logging.INFO):
                 total_items: int = data.get('data', {}).get('total', 0)
                 total_pages: int = math.ceil(total_items / self.page_size)
-                logger.info(f"请求成功。总记录数: {total_items}, 总页数: {total_pages}")
-                return {'code': 0, 'data': data['data']['list']}
-            elif data.get('code') == 402:
-                logger.warning("Token已过期")
-                return {"code": 402, "data": []}
-            else:
-                error_msg: str = data.get('msg', '未知错误')
-                logger.error(f"API返回错误: {error_msg}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"请求视频列表失败 (页码: {page_number}): {e}")
+                logger.info("请求成功。总记录数: %s, 总页数: %s", total_items, total_pages)
+            return {'code': 0, 'data': data['data']['list']}
+        elif data.get('code') == 402:
+            logger.warning("Token已过期")
+            return {"code": 402, "data": []}
+        else:
+            error_msg: str = data.get('msg', '未知错误')
+            logger.error(f"API返回错误: {error_msg}")
             return None
     
+    def fetch_video_pages(
+        self,
+        page_numbers: list[int],
+        max_workers: int = 10
+    ) -> list[dict[str, Any] | None]:
+        """
+        并发获取多页视频列表
+        
+        所有工作线程共享同一个Session及其连接池，网络往返时间由 N*RTT 降为约 RTT。
+        
+        Args:
+            page_numbers: 要获取的页码列表
+            max_workers: 最大并发线程数，不超过连接池大小 pool_maxsize
+            
+        Returns:
+            list[dict[str, Any] | None]: 与 page_numbers 顺序一致的结果列表，
+                每个元素与 fetch_video_page 的返回值相同
+                
+        Example:
+            >>> results = api.fetch_video_pages(page_numbers=[1, 2, 3])
+            >>> for result in results:
+            ...     if result and result.get('code') == 0:
+            ...         videos = result.get('data', [])
+        """
+        if not page_numbers:
+            return []
+        
+        # 并发数不超过连接池大小，避免urllib3丢弃连接
+        workers: int = max(1, min(max_workers, self.pool_maxsize, len(page_numbers)))
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results: list[dict[str, Any] | None] = list(
+                executor.map(self.fetch_video_page, page_numbers)
+            )
+        
+        return results
+    
+    def _get_cached_details(self, douban_id: str) -> dict[str, Any] | None:
+        """
+        读取未过期的视频详情缓存
+        
+        Args:
+            douban_id: 视频的豆瓣唯一标识
+            
+        Returns:
+            dict[str, Any] | None: 命中时返回缓存的响应，未命中或已过期返回None
+        """
+        with self._detail_cache_lock:
+            hit: tuple[float, dict[str, Any]] | None = self._detail_cache.get(douban_id)
+            if hit is None:
+                return None
+            
+            if time.monotonic() - hit[0] >= self._detail_cache_ttl:
+                del self._detail_cache[douban_id]
+                return None
+            
+            self._detail_cache.move_to_end(douban_id)
+            return hit[1]
+    
+    def _set_cached_details(self, douban_id: str, result: dict[str, Any]) -> None:
+        """
+        写入视频详情缓存，超出容量时淘汰最久未使用的条目
+        
+        Args:
+            douban_id: 视频的豆瓣唯一标识
+            result: 成功的详情响应
+        """
+        with self._detail_cache_lock:
+            self._detail_cache[douban_id] = (time.monotonic(), result)
+            self._detail_cache.move_to_end(douban_id)
+            
+            while len(self._detail_cache) > DETAIL_CACHE_MAXSIZE:
+                self._detail_cache.popitem(last=False)
+    
     def fetch_video_details(self, douban_id: str) -> dict[str, Any] | None:
         """
         根据douban_id获取视频详细信息
         
+        成功的响应会在进程内缓存 detail_cache_ttl 秒，重复查询直接返回缓存结果。
+        
         Args:
             douban_id: 视频的豆瓣唯一标识
             
@@ -349,46 +626,56 @@ class ApiHandler:
             >>> if details and details.get('code') == 0:
             ...     video_data = details.get('data')
         """
+        # 检查缓存
+        cached: dict[str, Any] | None = self._get_cached_details(douban_id=douban_id)
+        if cached is not None:
+            logger.debug("命中视频详情缓存 (douban_id: %s)", douban_id)
+            return cached
+        
         # 检查Token
+        self._ensure_token()
         if not self.token:
             logger.error("Token未设置，无法获取视频详情")
             return {"code": 402, "data": []}
         
-        # 构建请求载荷
-        payload: dict[str, str] = {
+        # 构建请求载荷（序列化一次，重试时复用）
+        body: bytes = orjson.dumps({
             "id": douban_id,
             "lang_code": "en"
-        }
-        
-        headers: dict[str, str] = self._default_headers(with_token=True)
+        })
         
-        try:
-            logger.info(f"正在获取视频详情 (douban_id: {douban_id})...")
-            
+        def _request() -> dict[str, Any]:
+            # 每次请求读取最新请求头，确保重新登录后使用新Token
+            self._detail_bucket.acquire()
             response: requests.Response = self.session.post(
                 url=self.video_detail_url,
-                data=json.dumps(payload),
-                headers=headers,
+                data=body,
+                headers=self._headers_with_token,
                 timeout=(self.connection_timeout, self.read_timeout),
                 verify=self.verify_ssl
             )
             response.raise_for_status()
-            data: dict[str, Any] = response.json()
-            
-            # 处理响应
-            if data.get('code') == 0 and 'data' in data and data['data'].get('list'):
-                logger.debug(f"视频详情获取成功 (douban_id: {douban_id})")
-                return {'code': 0, 'data': data['data']['list'][0]}
-            elif data.get('code') == 402:
-                logger.warning("Token已过期")
-                return {"code": 402, "data": []}
-            else:
-                error_msg: str = data.get('msg', '未知错误')
-                logger.error(f"获取视频详情失败 (douban_id: {douban_id}): {error_msg}")
-                return None
-                
-        except requests.RequestException as e:
-            logger.error(f"请求视频详情失败 (douban_id: {douban_id}): {e}")
+            return self._parse_response(response=response)
+        
+        logger.info("正在获取视频详情 (douban_id: %s)...", douban_id)
+        data: dict[str, Any] | None = self._retry(fn=_request)
+        
+        if data is None:
+            logger.error(f"请求视频详情失败 (douban_id: {douban_id})")
+            return None
+        
+        # 处理响应
+        if data.get('code') == 0 and 'data' in data and data['data'].get('list'):
+            logger.debug("视频详情获取成功 (douban_id: %s)", douban_id)
+            result: dict[str, Any] = {'code': 0, 'data': data['data']['list'][0]}
+            self._set_cached_details(douban_id=douban_id, result=result)
+            return result
+        elif data.get('code') == 402:
+            logger.warning("Token已过期")
+            return {"code": 402, "data": []}
+        else:
+            error_msg: str = data.get('msg', '未知错误')
+            logger.error(f"获取视频详情失败 (douban_id: {douban_id}): {error_msg}")
             return None
     
     def close(self) -> None:
@@ -401,3 +688,20 @@ class ApiHandler:
         if self.session:
             self.session.close()
             logger.debug("API处理器会话已关闭")
+        self._closed = True
+    
+    def __enter__(self) -> 'ApiHandler':
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def __del__(self) -> None:
+        # 兜底：未显式关闭时释放连接池，避免套接字泄漏
+        if getattr(self, '_closed', True):
+            return
+        try:
+            logger.warning("API处理器未显式关闭，已在回收时自动关闭")
+            self.close()
+        except Exception:
+            pass
@@ -26,6 +26,34 @@ from pymysql.cursors import DictCursor
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+# ============================================================================
+# 常量定义
+# ============================================================================
+
+# 单条 IN 查询的最大参数个数，超出时分批查询，避免语句过长超出 max_allowed_packet
+IN_QUERY_BATCH_SIZE: int = 1000
+
+
+# ============================================================================
+# 工具函数
+# ============================================================================
+
+def _trunc(value: str, max_length: int) -> str:
+    """
+    按最大长度截断字符串
+    
+    仅在超长时才切片，常见的未超长情况直接返回原对象，不产生新字符串。
+    
+    Args:
+        value: 原始字符串
+        max_length: 最大长度
+        
+    Returns:
+        str: 截断后的字符串
+    """
+    return value if len(value) <= max_length else value[:max_length]
+
+
 # ============================================================================
 # 数据库处理器类
 # ============================================================================
@@ -64,9 +92,8 @@ class DatabaseHandler:
     Example:
         >>> from core import DatabaseHandler, load_config
         >>> config = load_config()
-        >>> db = DatabaseHandler(config=config)
-        >>> exists = db.video_exists(douban_id="12345")
-        >>> db.close()
+        >>> with DatabaseHandler(config=config) as db:
+        ...     exists = db.video_exists(douban_id="12345")
     """
     
     def __init__(self, config: ConfigParser) -> None:
@@ -94,6 +121,10 @@ class DatabaseHandler:
         self.conn: Connection | None = None
         self.cursor: DictCursor | None = None
         
+        # 连接保活检测间隔（秒），避免每次获取游标都进行一次网络往返
+        self.ping_interval: int = db_config.getint('ping_interval', fallback=30)
+        self._last_ping: float = 0.0
+        
         # 表名配置
         self.video_table_name: str = db_config.get('vod_table_name', fallback='mac_vod')
         
@@ -107,6 +138,48 @@ class DatabaseHandler:
         self.status: int = 1
         self.trysee: int = 0
         
+        # 预生成插入SQL（表名在初始化后不再变化）
+        self._insert_sql: str = self._build_insert_sql()
+        
+        # 插入参数模板：常量列预先填好，None为每行需要填充的变量列
+        self._insert_template: list[Any] = [
+            self.typeId,            # 0  type_id
+            self.type_id_1,         # 1  type_id_1
+            None,                   # 2  vod_name
+            None,                   # 3  vod_sub
+            None,                   # 4  vod_blurb
+            None,                   # 5  vod_content
+            None,                   # 6  vod_total
+            None,                   # 7  vod_pic
+            None,                   # 8  vod_pic_thumb
+            None,                   # 9  vod_pic_slide
+            self.lang,              # 10 vod_lang
+            self.year,              # 11 vod_year
+            None,                   # 12 vod_class
+            self.vod_play_from,     # 13 vod_play_from
+            None,                   # 14 vod_play_url
+            None,                   # 15 vod_time
+            None,                   # 16 vod_time_add
+            None,                   # 17 vod_down_url
+            None,                   # 18 vod_letter
+            '',                     # 19 vod_color
+            '',                     # 20 vod_pic_screenshot
+            '',                     # 21 vod_actor
+            '',                     # 22 vod_writer
+            '',                     # 23 vod_behind
+            '',                     # 24 vod_remarks
+            self.year,              # 25 vod_pubdate
+            '',                     # 26 vod_serial
+            self.status,            # 27 vod_status
+            None,                   # 28 vod_tag
+            None,                   # 29 vod_douban_id
+            self.points,            # 30 vod_points
+            self.points,            # 31 vod_points_play
+            self.points,            # 32 vod_points_down
+            None,                   # 33 vod_trysee
+            None,                   # 34 vod_hits
+        ]
+        
         logger.info("数据库处理器初始化完成")
     
     def _get_conn(self) -> Connection | None:
@@ -119,17 +192,20 @@ class DatabaseHandler:
             Connection | None: 数据库连接对象，失败时返回None
             
         Note:
-            该方法实现了连接池管理和自动故障恢复机制
+            该方法实现了连接池管理和自动故障恢复机制，
+            距上次检测超过 ping_interval 秒时才执行 ping
         """
         try:
             if not self.conn or not self.conn.open:
                 logger.info("数据库连接不存在或已关闭，正在重连...")
                 self.conn = pymysql.connect(**self.conn_params)
                 self.cursor = None  # 废弃旧游标
+                self._last_ping = time.monotonic()
                 logger.info("数据库连接成功")
-            else:
+            elif time.monotonic() - self._last_ping > self.ping_interval:
                 # 保持连接活跃
                 self.conn.ping(reconnect=True)
+                self._last_ping = time.monotonic()
             
             return self.conn
             
@@ -185,6 +261,22 @@ class DatabaseHandler:
         self.cursor = None
         logger.info("数据库连接已关闭")
     
+    def __enter__(self) -> 'DatabaseHandler':
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def __del__(self) -> None:
+        # 兜底：未显式关闭时释放数据库连接
+        if getattr(self, 'conn', None) is None:
+            return
+        try:
+            logger.warning("数据库处理器未显式关闭，已在回收时自动关闭")
+            self.close()
+        except Exception:
+            pass
+    
     def video_exists(self, douban_id: str) -> bool:
         """
         检查视频是否已存在
@@ -200,6 +292,9 @@ class DatabaseHandler:
         Example:
             >>> if db.video_exists(douban_id="12345"):
             ...     print("视频已存在")
+        
+        Note:
+            依赖 vod_douban_id 上的索引，查询只扫描索引、不回表
         """
         cursor: DictCursor | None = self._get_cursor()
         
@@ -208,13 +303,13 @@ class DatabaseHandler:
             return False
         
         try:
-            sql: str = f"SELECT vod_id FROM {self.video_table_name} WHERE vod_douban_id = %s"
+            sql: str = f"SELECT 1 FROM {self.video_table_name} WHERE vod_douban_id = %s LIMIT 1"
             cursor.execute(sql, (douban_id,))
             result: dict[str, Any] | None = cursor.fetchone()
             exists: bool = result is not None
             
             if exists:
-                logger.debug(f"视频已存在 (douban_id: {douban_id})")
+                logger.debug("视频已存在 (douban_id: %s)", douban_id)
             
             return exists
             
@@ -222,6 +317,52 @@ class DatabaseHandler:
             logger.error(f"检查视频是否存在失败 (douban_id: {douban_id}): {e}")
             return False
     
+    def videos_exist(self, douban_ids: list[str]) -> set[str]:
+        """
+        批量检查视频是否已存在
+        
+        通过单条 IN 查询一次性返回已存在的豆瓣ID，替代逐条调用 video_exists；
+        ID数量超过 IN_QUERY_BATCH_SIZE 时按批查询。
+        
+        Args:
+            douban_ids: 豆瓣视频ID列表
+            
+        Returns:
+            set[str]: 数据库中已存在的豆瓣ID集合，错误时返回空集合
+            
+        Example:
+            >>> existing = db.videos_exist(douban_ids=["123", "456"])
+            >>> if "123" in existing:
+            ...     print("视频已存在")
+        """
+        if not douban_ids:
+            return set()
+        
+        cursor: DictCursor | None = self._get_cursor()
+        
+        if not cursor:
+            logger.error("无法获取数据库游标")
+            return set()
+        
+        try:
+            existing: set[str] = set()
+            for start in range(0, len(douban_ids), IN_QUERY_BATCH_SIZE):
+                batch: list[str] = douban_ids[start:start + IN_QUERY_BATCH_SIZE]
+                placeholders: str = ','.join(['%s'] * len(batch))
+                sql: str = (
+                    f"SELECT vod_douban_id FROM {self.video_table_name} "
+                    f"WHERE vod_douban_id IN ({placeholders})"
+                )
+                cursor.execute(sql, batch)
+                existing.update(str(row['vod_douban_id']) for row in cursor.fetchall())
+            
+            logger.debug("批量检查完成，已存在 %d/%d 条", len(existing), len(douban_ids))
+            return existing
+            
+        except pymysql.MySQLError as e:
+            logger.error(f"批量检查视频是否存在失败: {e}")
+            return set()
+    
     def insert_video(self, video_data: dict[str, Any]) -> bool:
         """
         向数据库插入新视频记录
@@ -241,7 +382,10 @@ class DatabaseHandler:
             - free_watch_episodes: 免费观看集数
             
         Returns:
-            bool: 插入成功返回True，失败返回False
+            bool: 插入并提交成功返回True，失败返回False（返回True时记录已持久化）
+            
+        Note:
+            批量写入请使用 insert_videos，整批只提交一次
             
         Example:
             >>> video = {
@@ -259,20 +403,86 @@ class DatabaseHandler:
             logger.error("无法获取数据库连接或游标")
             return False
         
-        # 提取和处理视频数据
         title: str = video_data.get('title', '')
-        cover_url: str = video_data.get('cover', '')
-        video_class: str = ",".join(video_data.get('tags', []))[:255]
-        vod_tag: str = video_class[:99]
-        vod_play_url: str = "#".join(video_data.get('video_list', []))
-        vod_down_url: str = video_data.get('download_url', '')
-        vod_content: str = video_data.get('desc', '')
-        vod_blurb: str = vod_content[:250]
+        logger.info("准备插入视频: '%s' (douban_id: %s)", title, video_data.get('id'))
         
-        logger.info(f"准备插入视频: '{title}' (douban_id: {video_data.get('id')})")
+        params: tuple = self._build_insert_params(video_data=video_data, now_time=int(time.time()))
         
-        # 构建SQL语句
-        sql: str = f"""
+        try:
+            cursor.execute(self._insert_sql, params)
+            conn.commit()
+            
+            logger.info("视频插入成功: '%s' (douban_id: %s)", title, video_data.get('id'))
+            return True
+            
+        except pymysql.MySQLError as e:
+            logger.error(f"插入视频失败: '{title}': {e}")
+            conn.rollback()
+            return False
+    
+    def insert_videos(self, videos: list[dict[str, Any]]) -> list[str]:
+        """
+        批量插入视频记录
+        
+        使用 executemany 在单个事务中写入所有记录，pymysql会将其合并为一条
+        多行 INSERT 语句，整批只需一次网络往返和一次提交。
+        整批失败时回滚，再逐条插入以定位并跳过出错的记录。
+        
+        Args:
+            videos: 视频信息字典列表，字段要求同 insert_video
+            
+        Returns:
+            list[str]: 插入成功的豆瓣ID列表（字符串类型）
+            
+        Example:
+            >>> inserted_ids = db.insert_videos(videos=[video1, video2])
+        """
+        if not videos:
+            return []
+        
+        conn: Connection | None = self._get_conn()
+        cursor: DictCursor | None = self._get_cursor()
+        
+        if not conn or not cursor:
+            logger.error("无法获取数据库连接或游标")
+            return []
+        
+        now_time: int = int(time.time())
+        
+        # 一次性生成整批点击量随机数
+        hits_list: list[int] = random.choices(range(100000, 300001), k=len(videos))
+        params_list: list[tuple] = [
+            self._build_insert_params(video_data=video, now_time=now_time, hits=hits)
+            for video, hits in zip(videos, hits_list)
+        ]
+        
+        try:
+            cursor.executemany(self._insert_sql, params_list)
+            conn.commit()
+            logger.info("批量插入成功，共 %d 条记录", len(videos))
+            return [str(video.get('id', '')) for video in videos]
+            
+        except pymysql.MySQLError as e:
+            logger.error(f"批量插入视频失败，改为逐条插入: {e}")
+            conn.rollback()
+        
+        # 逐条插入并提交，出错的记录单独跳过，返回的ID均已持久化
+        return [
+            str(video.get('id', '')) for video in videos
+            if self.insert_video(video_data=video)
+        ]
+    
+    def _build_insert_sql(self) -> str:
+        """
+        构建视频插入SQL语句（仅在初始化时调用一次）
+        
+        Returns:
+            str: 带35个占位符的 INSERT 语句
+            
+        Note:
+            保持单个 VALUES (...) 的形式，pymysql的 executemany 才会将其改写为多行插入
+        """
+        return f"""
             INSERT INTO {self.video_table_name} (
                 type_id, type_id_1, vod_name, vod_sub, vod_blurb, vod_content,
                 vod_total, vod_pic, vod_pic_thumb, vod_pic_slide, vod_lang, vod_year,
@@ -287,57 +497,52 @@ class DatabaseHandler:
                 %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
             )
         """
+    
+    def _build_insert_params(
+        self,
+        video_data: dict[str, Any],
+        now_time: int,
+        hits: int | None = None
+    ) -> tuple:
+        """
+        构建单条视频记录的插入参数
         
-        # 准备参数
-        now_time: int = int(time.time())
-        params: tuple = (
-            self.typeId,                                      # type_id
-            self.type_id_1,                                   # type_id_1
-            title,                                            # vod_name
-            title,                                            # vod_sub
-            vod_blurb,                                        # vod_blurb
-            vod_content,                                      # vod_content
-            video_data.get('total_episodes', 0),              # vod_total
-            cover_url,                                        # vod_pic
-            cover_url,                                        # vod_pic_thumb
-            cover_url,                                        # vod_pic_slide
-            self.lang,                                        # vod_lang
-            self.year,                                        # vod_year
-            video_class,                                      # vod_class
-            self.vod_play_from,                               # vod_play_from
-            vod_play_url,                                     # vod_play_url
-            now_time,                                         # vod_time
-            now_time,                                         # vod_time_add
-            vod_down_url,                                     # vod_down_url
-            title[0:1] if title else '',                      # vod_letter
-            '',                                               # vod_color
-            '',                                               # vod_pic_screenshot
-            '',                                               # vod_actor
-            '',                                               # vod_writer
-            '',                                               # vod_behind
-            '',                                               # vod_remarks
-            self.year,                                        # vod_pubdate
-            '',                                               # vod_serial
-            self.status,                                      # vod_status
-            vod_tag,                                          # vod_tag
-            video_data.get('id'),                             # vod_douban_id
-            self.points,                                      # vod_points
-            self.points,                                      # vod_points_play
-            self.points,                                      # vod_points_down
-            video_data.get('free_watch_episodes', 0),         # vod_trysee
-            random.randint(100000, 300000)                    # vod_hits
-        )
-        
-        try:
-            cursor.execute(sql, params)
-            conn.commit()
-            logger.info(f"视频插入成功: '{title}' (douban_id: {video_data.get('id')})")
-            return True
+        Args:
+            video_data: 视频信息字典
+            now_time: 写入时间戳
+            hits: 预生成的点击量，为None时随机生成
             
-        except pymysql.MySQLError as e:
-            logger.error(f"插入视频失败: '{title}': {e}")
-            conn.rollback()
-            return False
+        Returns:
+            tuple: 与 _build_insert_sql 列顺序一致的参数元组
+        """
+        # 提取和处理视频数据
+        title: str = video_data.get('title', '')
+        cover_url: str = video_data.get('cover', '')
+        video_class: str = _trunc(",".join(video_data.get('tags', [])), 255)
+        vod_tag: str = _trunc(video_class, 99)
+        vod_play_url: str = "#".join(video_data.get('video_list', []))
+        vod_down_url: str = video_data.get('download_url', '')
+        vod_content: str = video_data.get('desc', '')
+        vod_blurb: str = _trunc(vod_content, 250)
+        
+        # 复制参数模板，仅填充变量列
+        params: list[Any] = self._insert_template.copy()
+        params[2] = params[3] = title
+        params[4] = vod_blurb
+        params[5] = vod_content
+        params[6] = video_data.get('total_episodes', 0)
+        params[7] = params[8] = params[9] = cover_url
+        params[12] = video_class
+        params[14] = vod_play_url
+        params[15] = params[16] = now_time
+        params[17] = vod_down_url
+        params[18] = title[0:1] if title else ''
+        params[28] = vod_tag
+        params[29] = video_data.get('id')
+        params[33] = video_data.get('free_watch_episodes', 0)
+        params[34] = hits if hits is not None else random.randint(100000, 300000)
+        
+        return tuple(params)
     
     def get_videos_by_ids(self, douban_ids: list[str]) -> list[dict[str, Any]]:
         """
@@ -365,12 +570,15 @@ class DatabaseHandler:
             return []
         
         try:
-            # 构建IN查询
-            placeholders: str = ','.join(['%s'] * len(douban_ids))
-            sql: str = f"SELECT * FROM {self.video_table_name} WHERE vod_douban_id IN ({placeholders})"
-            
-            cursor.execute(sql, douban_ids)
-            results: list[dict[str, Any]] = cursor.fetchall()
+            # 构建IN查询（超过 IN_QUERY_BATCH_SIZE 时分批）
+            results: list[dict[str, Any]] = []
+            for start in range(0, len(douban_ids), IN_QUERY_BATCH_SIZE):
+                batch: list[str] = douban_ids[start:start + IN_QUERY_BATCH_SIZE]
+                placeholders: str = ','.join(['%s'] * len(batch))
+                sql: str = f"SELECT * FROM {self.video_table_name} WHERE vod_douban_id IN ({placeholders})"
+                
+                cursor.execute(sql, batch)
+                results.extend(cursor.fetchall())
             
             logger.info(f"批量查询成功，返回 {len(results)} 条记录")
             return results
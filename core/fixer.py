@@ -0,0 +1,267 @@
+"""
+存储同步修复组件
+
+OSS与S3修复任务共用的失败记录重放逻辑：重新获取视频详情并重新上传到对应存储。
+
+Author: Qasim
+Version: 2.0
+Python: 3.11+
+Date: 2025-01-14
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from configparser import ConfigParser
+from typing import TYPE_CHECKING, Any
+
+from core.handlers import get_api_handler
+from core.util_handler import load_state, save_state
+
+if TYPE_CHECKING:
+    from core.api_handler import ApiHandler
+    from core.oss_handler import OSSHandler
+    from core.s3_handler import S3Handler
+
+# ============================================================================
+# 模块级日志记录器
+# ============================================================================
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# 常量定义
+# ============================================================================
+
+# 单个记录遇到Token过期时的最大尝试次数
+REPLAY_MAX_ATTEMPTS: int = 2
+
+# 默认并发修复线程数
+REPLAY_CONCURRENCY: int = 8
+
+# 状态写入在并发修复线程间互斥
+_state_lock: threading.Lock = threading.Lock()
+
+
+# ============================================================================
+# 失败记录重放
+# ============================================================================
+
+def _replay_one(
+    api: 'ApiHandler',
+    handler: 'OSSHandler | S3Handler',
+    douban_id: str,
+    state: dict[str, Any],
+    label: str
+) -> bool:
+    """
+    重新同步单个失败记录
+    
+    Args:
+        api: API处理器
+        handler: 存储处理器（OSS或S3）
+        douban_id: 豆瓣ID
+        state: 项目状态（重新登录后更新其中的Token）
+        label: 存储名称，用于日志
+    
+    Returns:
+        bool: 需要保留在失败列表中时返回False；修复成功或详情缺失（无法重试）时返回True
+    """
+    logger.info("开始修复: %s", douban_id)
+    
+    for attempt in range(REPLAY_MAX_ATTEMPTS):
+        # 记录本次请求使用的Token，遇到402时据此判断是否已被其他线程刷新
+        used_token: str | None = api.token
+        
+        # 获取视频详情（ApiHandler在进程内按TTL缓存详情，OSS与S3修复共用）
+        response_data: dict[str, Any] | None = api.fetch_video_details(
+            douban_id=str(douban_id)
+        )
+        
+        if response_data is None:
+            logger.error("获取详情失败 (douban_id: %s)", douban_id)
+            return True
+        
+        response_code: int = response_data.get('code', -1)
+        
+        if response_code == 0:
+            details: dict[str, Any] | None = response_data.get('data')
+            
+            if not details:
+                logger.warning("视频详情为空，跳过: %s", douban_id)
+                return True
+            
+            # 上传到存储
+            try:
+                result: bool = handler.process_single_video_sync(
+                    douban_id=douban_id,
+                    title=details.get('title', ''),
+                    video_list=details.get('video_list', []),
+                    cover=details.get('cover', '')
+                )
+                
+                if result:
+                    logger.info("修复成功: %s", douban_id)
+                    return True
+                else:
+                    raise Exception(f"{label}同步失败")
+            
+            except Exception as e:
+                logger.error("%s同步异常: %s", label, e)
+                return False
+        
+        elif response_code == 402:
+            # Token过期，重新登录
+            logger.warning("Token已过期，尝试重新登录 (第 %s 次)", attempt + 1)
+            if not api.refresh_token_if_stale(stale_token=used_token):
+                logger.error("重新登录失败")
+                return False
+            
+            # 仅在Token实际变化时写入状态（多个线程可能共享同一次重新登录的结果）
+            with _state_lock:
+                if state['api'].get('token') != api.token:
+                    state['api']['token'] = api.token
+                    save_state(data=state)
+            continue
+        else:
+            logger.error("未知API错误 (Code: %s)", response_code)
+            return False
+    
+    return True
+
+
+def replay_failed_ids(
+    config: ConfigParser,
+    handler_factory: Callable[[ConfigParser], 'OSSHandler | S3Handler'],
+    state_key: str,
+    label: str,
+    should_stop: Callable[[], bool] | None = None,
+    register: Callable[[str, Any], None] | None = None
+) -> None:
+    """
+    重放状态文件中记录的存储同步失败ID
+    
+    按 [fixer] concurrency 并发重新获取视频详情并上传（请求速率由ApiHandler的令牌桶控制），
+    仍然失败的ID写回 state[state_key]['failed_synced_ids']。
+    
+    Args:
+        config: 项目配置对象
+        handler_factory: 存储处理器获取函数（如 get_oss_handler / get_s3_handler）
+        state_key: 状态文件中的存储分组键（'oss' 或 's3'）
+        label: 存储名称，用于日志
+        should_stop: 返回True时停止提交，未开始处理的ID保留在失败列表中
+        register: 处理器创建后的注册回调（名称, 实例），用于退出时统一释放
+    
+    Example:
+        >>> replay_failed_ids(
+        ...     config=config,
+        ...     handler_factory=get_oss_handler,
+        ...     state_key='oss',
+        ...     label='OSS'
+        ... )
+    """
+    logger.info("=" * 80)
+    logger.info("启动%s数据修复脚本", label)
+    logger.info("=" * 80)
+    
+    state: dict[str, Any] = load_state()
+    # 同一ID可能被多次记录失败（整数与字符串形式混杂），去重后保持原有顺序，避免并发重复上传
+    fix_ids: list[str] = list(dict.fromkeys(
+        str(douban_id) for douban_id in state.get(state_key, {}).get('failed_synced_ids', [])
+    ))
+    
+    if not fix_ids:
+        logger.info("没有需要修复的%s记录", label)
+        return
+    
+    logger.info("需要修复的记录数: %s", len(fix_ids))
+    
+    # 初始化处理器
+    api: ApiHandler = get_api_handler(config=config)
+    handler: OSSHandler | S3Handler = handler_factory(config=config)
+    
+    # 注册资源用于清理
+    if register is not None:
+        register('api', api)
+        register(f'{state_key}_handler', handler)
+    
+    # 设置Token
+    token: str | None = state.get('api', {}).get('token', '')
+    if token:
+        api.set_token(token=token)
+    
+    # 每个线程都要请求详情接口，并发数不超过API连接池大小
+    concurrency: int = max(1, min(
+        config.getint('fixer', 'concurrency', fallback=REPLAY_CONCURRENCY),
+        api.pool_maxsize
+    ))
+    failed_synced_ids: list[str] = []
+    failed_lock: threading.Lock = threading.Lock()
+    
+    def _replay(douban_id: str) -> None:
+        # 未开始时检查退出标志，已开始的记录照常完成
+        if should_stop is not None and should_stop():
+            ok: bool = False
+        else:
+            ok = _replay_one(api=api, handler=handler, douban_id=douban_id, state=state, label=label)
+        
+        if not ok:
+            with failed_lock:
+                failed_synced_ids.append(douban_id)
+    
+    executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=concurrency)
+    futures: dict[Future[None], str] = {}
+    
+    def _keep_unfinished() -> None:
+        # 中断时取消尚未开始的记录；未正常完成（已取消、执行中、未提交或抛出异常）的ID全部保留在失败列表中，
+        # 已正常完成的记录在 _replay 中自行登记了结果
+        executor.shutdown(wait=False, cancel_futures=True)
+        finished: set[str] = {
+            douban_id for future, douban_id in futures.items()
+            if future.done() and not future.cancelled() and future.exception() is None
+        }
+        with failed_lock:
+            recorded: set[str] = set(failed_synced_ids)
+            failed_synced_ids.extend(
+                douban_id for douban_id in fix_ids
+                if douban_id not in finished and douban_id not in recorded
+            )
+    
+    try:
+        futures = {executor.submit(_replay, douban_id): douban_id for douban_id in fix_ids}
+        
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error("修复异常 (douban_id: %s): %s", futures[future], e)
+                with failed_lock:
+                    failed_synced_ids.append(futures[future])
+        
+        if should_stop is not None and should_stop():
+            logger.warning("检测到退出信号，未处理的记录已保留")
+        
+        # 更新状态
+        with _state_lock:
+            state[state_key]['failed_synced_ids'] = failed_synced_ids
+            save_state(data=state)
+    
+    except KeyboardInterrupt:
+        logger.warning("用户中断操作 (Ctrl+C)，保存当前进度...")
+        _keep_unfinished()
+        with _state_lock:
+            state[state_key]['failed_synced_ids'] = failed_synced_ids
+            save_state(data=state)
+    except Exception as e:
+        logger.error("脚本执行异常: %s", e, exc_info=True)
+        _keep_unfinished()
+        with _state_lock:
+            state[state_key]['failed_synced_ids'] = failed_synced_ids
+            save_state(data=state)
+    finally:
+        executor.shutdown(wait=False)
+        logger.info("=" * 80)
+        logger.info("%s数据修复脚本执行结束", label)
+        logger.info("=" * 80)
@@ -0,0 +1,171 @@
+"""
+处理器实例管理
+
+按配置对象缓存各处理器实例，同一进程内的多个任务复用同一处理器及其HTTP连接池，
+避免重复建立TCP/TLS连接和数据库连接。处理器模块在首次获取时才导入，
+未用到的SDK（boto3、OSS、pymysql等）不会拖慢命令启动。
+
+Author: Qasim
+Version: 2.0
+Python: 3.11+
+Date: 2025-01-14
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from configparser import ConfigParser
+from typing import TYPE_CHECKING, Any, TypeVar
+
+if TYPE_CHECKING:
+    from core.api_handler import ApiHandler
+    from core.db_handler import DatabaseHandler
+    from core.oss_handler import OSSHandler
+    from core.s3_handler import S3Handler
+    from core.site_handler import SiteHandler
+
+# ============================================================================
+# 模块级日志记录器
+# ============================================================================
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# 处理器缓存
+# ============================================================================
+
+# ConfigParser 不可哈希，缓存按 (处理器名称, id(config)) 索引；
+# 同时保存配置对象引用，防止其被回收后 id 被新对象复用而误命中
+_handler_cache: dict[tuple[str, int], tuple[ConfigParser, Any]] = {}
+_handler_cache_lock: threading.Lock = threading.Lock()
+
+HandlerT = TypeVar('HandlerT')
+
+
+def _get_cached_handler(
+    name: str,
+    config: ConfigParser,
+    factory: Callable[[ConfigParser], HandlerT]
+) -> HandlerT:
+    """
+    按配置对象身份获取缓存的处理器，不存在时创建（内部函数）
+    
+    Args:
+        name: 处理器名称
+        config: 项目配置对象
+        factory: 处理器类或构造函数
+    
+    Returns:
+        HandlerT: 缓存的处理器实例
+    """
+    key: tuple[str, int] = (name, id(config))
+    
+    with _handler_cache_lock:
+        cached: tuple[ConfigParser, Any] | None = _handler_cache.get(key)
+        if cached is None or cached[0] is not config:
+            handler: HandlerT = factory(config)
+            _handler_cache[key] = (config, handler)
+            logger.debug("创建%s处理器", name)
+            return handler
+        return cached[1]
+
+
+# ============================================================================
+# 处理器获取函数
+# ============================================================================
+
+def get_api_handler(config: ConfigParser) -> 'ApiHandler':
+    """
+    获取API处理器（同一配置对象只创建一次）
+    
+    Args:
+        config: 项目配置对象
+    
+    Returns:
+        ApiHandler: 缓存的API处理器
+    
+    Example:
+        >>> api = get_api_handler(config=config)
+    """
+    from core.api_handler import ApiHandler
+    
+    return _get_cached_handler(name='api', config=config, factory=ApiHandler)
+
+
+def get_database_handler(config: ConfigParser) -> 'DatabaseHandler':
+    """
+    获取数据库处理器（同一配置对象只创建一次）
+    
+    Args:
+        config: 项目配置对象
+    
+    Returns:
+        DatabaseHandler: 缓存的数据库处理器
+    
+    Note:
+        数据库连接不是线程安全的，只应在主线程中使用
+    """
+    from core.db_handler import DatabaseHandler
+    
+    return _get_cached_handler(name='database', config=config, factory=DatabaseHandler)
+
+
+def get_oss_handler(config: ConfigParser) -> 'OSSHandler':
+    """
+    获取OSS处理器（同一配置对象只创建一次）
+    
+    Args:
+        config: 项目配置对象
+    
+    Returns:
+        OSSHandler: 缓存的OSS处理器
+    """
+    from core.oss_handler import OSSHandler
+    
+    return _get_cached_handler(name='oss', config=config, factory=OSSHandler)
+
+
+def get_s3_handler(config: ConfigParser) -> 'S3Handler':
+    """
+    获取S3处理器（同一配置对象只创建一次）
+    
+    Args:
+        config: 项目配置对象
+    
+    Returns:
+        S3Handler: 缓存的S3处理器
+    """
+    from core.s3_handler import S3Handler
+    
+    return _get_cached_handler(name='s3', config=config, factory=S3Handler)
+
+
+def get_site_handler(config: ConfigParser) -> 'SiteHandler':
+    """
+    获取站点处理器（同一配置对象只创建一次）
+    
+    Args:
+        config: 项目配置对象
+    
+    Returns:
+        SiteHandler: 缓存的站点处理器
+    """
+    from core.site_handler import SiteHandler
+    
+    return _get_cached_handler(name='site', config=config, factory=SiteHandler)
+
+
+def clear_handlers() -> None:
+    """
+    清除处理器缓存
+    
+    处理器被 close() 后或配置重新加载后调用，之后的获取将创建新实例。
+    
+    Example:
+        >>> clear_handlers()
+        >>> api = get_api_handler(config=load_config(force_reload=True))
+    """
+    with _handler_cache_lock:
+        _handler_cache.clear()
+    logger.debug("处理器缓存已清除")
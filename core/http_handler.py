@@ -0,0 +1,191 @@
+"""
+HTTP连接公共组件
+
+提供各处理器共用的HTTP适配器与进程级共享会话，统一启用TCP Keep-Alive以复用池化连接。
+
+Author: Qasim
+Version: 2.0
+Python: 3.11+
+Date: 2025-01-14
+"""
+
+import logging
+import socket
+import threading
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.sessions import Session
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+# ============================================================================
+# 模块级日志记录器
+# ============================================================================
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# 常量定义
+# ============================================================================
+
+# TCP Keep-Alive配置（秒）：空闲探测开始时间、探测间隔、探测次数
+KEEPALIVE_IDLE: int = 60
+KEEPALIVE_INTERVAL: int = 10
+KEEPALIVE_COUNT: int = 6
+
+# 共享下载会话的连接池大小（并发下载数不应超过该值，超出时阻塞等待空闲连接）
+DOWNLOAD_POOL_MAXSIZE: int = 32
+
+# 共享下载会话回收空闲连接的间隔（秒），防止长时间运行时CLOSE_WAIT套接字累积
+SESSION_REAP_INTERVAL: float = 300.0
+
+# 进程级共享下载会话（OSS/S3处理器共用，首次使用时创建）
+_SHARED_SESSION: Session | None = None
+_SHARED_SESSION_LOCK: threading.Lock = threading.Lock()
+
+
+# ============================================================================
+# HTTP适配器
+# ============================================================================
+
+def _keepalive_socket_options() -> list[tuple[int, int, int]]:
+    """
+    生成启用TCP Keep-Alive的套接字选项
+    
+    在urllib3默认选项（TCP_NODELAY）基础上追加Keep-Alive探测配置，
+    不支持的平台选项会被自动跳过。
+    
+    Returns:
+        list[tuple[int, int, int]]: 套接字选项列表
+    """
+    options: list[tuple[int, int, int]] = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE))
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL))
+    if hasattr(socket, 'TCP_KEEPCNT'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT))
+    
+    return options
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """
+    启用TCP Keep-Alive的HTTP适配器
+    
+    池化连接在空闲期间保持存活，避免被中间设备静默断开后重新进行
+    TCP/TLS握手，使一次握手的成本分摊到同一连接上的所有请求。
+    """
+    
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs['socket_options'] = _keepalive_socket_options()
+        super().init_poolmanager(*args, **kwargs)
+
+
+# ============================================================================
+# 共享下载会话
+# ============================================================================
+
+def create_download_session(pool_maxsize: int = DOWNLOAD_POOL_MAXSIZE) -> Session:
+    """
+    创建用于下载源文件（m3u8/封面）的HTTP会话
+    
+    设置连接池、重试策略，并启用TCP Keep-Alive。
+    连接池满时阻塞等待空闲连接（pool_block），而不是临时创建池外连接。
+    
+    Args:
+        pool_maxsize: 每个主机的连接池大小
+        
+    Returns:
+        Session: 配置好的requests会话对象
+    """
+    session: Session = requests.Session()
+    
+    # 配置重试策略
+    retry_strategy: Retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"]
+    )
+    
+    # 配置HTTP适配器
+    adapter: HTTPAdapter = KeepAliveHTTPAdapter(
+        pool_connections=pool_maxsize,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry_strategy,
+        pool_block=True
+    )
+    
+    session.mount(prefix='http://', adapter=adapter)
+    session.mount(prefix='https://', adapter=adapter)
+    
+    logger.debug("下载会话配置完成")
+    return session
+
+
+def reset_connection_pools(session: Session) -> None:
+    """
+    关闭会话连接池中的全部连接
+    
+    空闲连接立即关闭；正在使用的连接在请求结束归还时关闭，
+    后续请求会按需重新建立连接，会话本身仍可继续使用。
+    
+    Args:
+        session: 需要回收连接的requests会话
+    """
+    for adapter in session.adapters.values():
+        if isinstance(adapter, HTTPAdapter):
+            adapter.poolmanager.clear()
+
+
+def _reap_idle_connections(session: Session) -> None:
+    """
+    定时回收共享会话的连接（后台守护线程）
+    
+    Args:
+        session: 需要定时回收连接的requests会话
+    """
+    while True:
+        time.sleep(SESSION_REAP_INTERVAL)
+        try:
+            reset_connection_pools(session=session)
+            logger.debug("共享下载会话连接已回收")
+        except Exception as e:
+            logger.warning("回收共享下载会话连接失败: %s", e)
+
+
+def get_shared_session() -> Session:
+    """
+    获取进程级共享的下载会话
+    
+    OSS与S3处理器默认共用同一会话及连接池，同一CDN主机的连接可跨处理器复用。
+    该会话由进程持有，处理器的 close() 不会关闭它；后台线程每隔
+    SESSION_REAP_INTERVAL 秒回收一次连接，避免半关闭套接字长期占用文件描述符。
+    
+    Returns:
+        Session: 共享的requests会话对象
+        
+    Example:
+        >>> session = get_shared_session()
+        >>> oss_handler = OSSHandler(config=config, session=session)
+    """
+    global _SHARED_SESSION
+    
+    if _SHARED_SESSION is None:
+        with _SHARED_SESSION_LOCK:
+            if _SHARED_SESSION is None:
+                _SHARED_SESSION = create_download_session()
+                threading.Thread(
+                    target=_reap_idle_connections,
+                    args=(_SHARED_SESSION,),
+                    name='session-reaper',
+                    daemon=True
+                ).start()
+    return _SHARED_SESSION
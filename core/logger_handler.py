@@ -9,11 +9,14 @@ Python: 3.11+
 Date: 2025-01-14
 """
 
+import atexit
 import logging
+import queue
 import sys
 import threading
-from datetime import datetime
+import time
 from logging import FileHandler, Formatter, StreamHandler
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from pathlib import Path
 
 from core.util_handler import BASE_DIR
@@ -31,6 +34,19 @@ LOG_FORMAT: str = (
 # 日志时间格式
 LOG_DATE_FORMAT: str = '%Y-%m-%d %H:%M:%S'
 
+# 文件日志缓冲容量（条）：缓冲满或遇到ERROR及以上级别时批量写入
+LOG_BUFFER_CAPACITY: int = 1024
+
+# 文件日志定时刷新间隔（秒），限制日志落盘的最大延迟
+LOG_FLUSH_INTERVAL: float = 30.0
+
+# 后台日志监听器（负责实际的文件/控制台写入）
+_queue_listener: QueueListener | None = None
+
+# 文件日志缓冲处理器及其定时刷新线程的停止信号
+_memory_handler: MemoryHandler | None = None
+_flush_stop_event: threading.Event | None = None
+
 
 # ============================================================================
 # 自定义日志处理器
@@ -60,6 +76,7 @@ class HourlyDirectoryLogHandler(FileHandler):
     Attributes:
         log_dir: 日志基础目录路径
         _lock: 线程锁，保护文件切换操作
+        _next_rollover: 下一次切换日志文件的时间戳（下一个整点）
     """
     
     def __init__(self, log_dir: Path, encoding: str = 'utf-8') -> None:
@@ -83,24 +100,75 @@ class HourlyDirectoryLogHandler(FileHandler):
         
         # 调用父类初始化
         super().__init__(filename=str(initial_log_path), encoding=encoding)
+        
+        # 缓存下一个整点时间，emit时只需一次数值比较
+        self._next_rollover: float = self._compute_next_rollover(now=time.time())
     
-    def _get_log_path(self) -> Path:
+    @staticmethod
+    def _compute_next_rollover(now: float) -> float:
         """
-        根据当前时间计算日志文件完整路径
+        计算下一个本地整点的时间戳
+        
+        Args:
+            now: 当前时间戳
+            
+        Returns:
+            float: 下一个整点的时间戳
+        """
+        local_time: time.struct_time = time.localtime(now)
+        return int(now) - local_time.tm_min * 60 - local_time.tm_sec + 3600
+    
+    def _get_log_path(self, now: float | None = None) -> Path:
+        """
+        根据时间计算日志文件完整路径
+        
+        Args:
+            now: 时间戳，为None时使用当前时间
         
         Returns:
             Path: 日志文件的完整路径 (例: logs/20250114/15.log)
         """
-        now: datetime = datetime.now()
-        date_dir: Path = self.log_dir / now.strftime('%Y%m%d')
-        log_filename: str = now.strftime('%H') + '.log'
-        return date_dir / log_filename
+        lt: time.struct_time = time.localtime(now)
+        date_dir: Path = self.log_dir / f"{lt.tm_year:04d}{lt.tm_mon:02d}{lt.tm_mday:02d}"
+        return date_dir / f"{lt.tm_hour:02d}.log"
+    
+    def _rollover(self, now: float) -> None:
+        """
+        切换到当前小时对应的日志文件
+        
+        Args:
+            now: 当前时间戳
+        """
+        current_log_path: Path = self._get_log_path(now=now)
+        
+        if self.baseFilename != str(current_log_path):
+            # 确保新目录存在
+            current_log_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # 关闭当前文件流
+            if self.stream:
+                try:
+                    self.stream.flush()
+                    self.stream.close()
+                except Exception:
+                    pass
+                finally:
+                    self.stream = None
+            
+            # 更新文件路径
+            self.baseFilename = str(current_log_path)
+            self.mode = 'a'  # 追加模式
+            
+            # 重新打开文件
+            self.stream = self._open()
+        
+        self._next_rollover = self._compute_next_rollover(now=now)
     
     def emit(self, record: logging.LogRecord) -> None:
         """
         发送日志记录
         
-        在每次写入前检查是否需要切换日志文件（跨小时或跨日）。
+        仅在跨越整点后才重新计算日志路径并切换文件，其余情况只做一次时间比较。
         
         Args:
             record: 日志记录对象
@@ -109,37 +177,21 @@ class HourlyDirectoryLogHandler(FileHandler):
             该方法会自动处理文件切换，无需手动干预
         """
         try:
-            with self._lock:
-                current_log_path: Path = self._get_log_path()
-                
-                # 检查是否需要切换日志文件
-                if self.baseFilename != str(current_log_path):
-                    # 确保新目录存在
-                    current_log_path.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # 关闭当前文件流
-                    if self.stream:
-                        try:
-                            self.stream.flush()
-                            self.stream.close()
-                        except Exception:
-                            pass
-                        finally:
-                            self.stream = None
-                    
-                    # 更新文件路径
-                    self.baseFilename = str(current_log_path)
-                    self.mode = 'a'  # 追加模式
-                    
-                    # 重新打开文件
-                    self.stream = self._open()
-                
-                # 确保文件流有效
-                if self.stream is None or self.stream.closed:
-                    self.stream = self._open()
-                
-                # 调用父类方法完成日志写入
-                super().emit(record)
+            # 以记录产生时间判断切换，缓冲批量写入时日志仍落入所属小时的文件
+            now: float = record.created
+            
+            # 检查是否需要切换日志文件（跨小时或跨日）
+            if now >= self._next_rollover:
+                with self._lock:
+                    if now >= self._next_rollover:
+                        self._rollover(now=now)
+            
+            # 确保文件流有效
+            if self.stream is None or self.stream.closed:
+                self.stream = self._open()
+            
+            # 调用父类方法完成日志写入
+            super().emit(record)
                 
         except Exception as e:
             # 如果日志写入失败，尝试输出到stderr，避免程序崩溃
@@ -155,15 +207,47 @@ class HourlyDirectoryLogHandler(FileHandler):
 # 日志系统初始化
 # ============================================================================
 
+def _periodic_flush(handler: MemoryHandler, stop_event: threading.Event) -> None:
+    """
+    定时刷新文件日志缓冲，直到收到停止信号
+    
+    Args:
+        handler: 需要刷新的缓冲处理器
+        stop_event: 停止信号
+    """
+    while not stop_event.wait(timeout=LOG_FLUSH_INTERVAL):
+        handler.flush()
+
+
+def _stop_queue_listener() -> None:
+    """
+    停止后台日志监听器并写出队列和缓冲中剩余的日志
+    """
+    global _queue_listener, _memory_handler, _flush_stop_event
+    
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+    if _flush_stop_event is not None:
+        _flush_stop_event.set()
+        _flush_stop_event = None
+    if _memory_handler is not None:
+        _memory_handler.close()
+        _memory_handler = None
+
+
 def setup_logger() -> None:
     """
     配置全局日志记录器
     
     设置日志级别、格式和输出目标（文件+控制台双输出）。
+    根日志记录器只挂载一个 QueueHandler，调用线程仅做入队；
+    实际的文件与控制台写入由后台 QueueListener 线程完成，
+    文件日志再经 MemoryHandler 缓冲，按容量、ERROR级别或定时批量落盘。
     
     Configuration:
         - 日志级别: INFO
-        - 输出目标: 文件（按小时分级） + 控制台
+        - 输出目标: 文件（按小时分级） + 控制台（经队列异步写入）
         - 日志格式: 时间 + 级别 + 模块 + 函数 + 行号 + 消息
         - 文件编码: UTF-8
     
@@ -176,13 +260,16 @@ def setup_logger() -> None:
         >>> import logging
         >>> logging.info("应用程序已启动")
     """
+    global _queue_listener, _memory_handler, _flush_stop_event
+    
     log_dir: Path = BASE_DIR / 'logs'
     
     # 获取根日志记录器
     root_logger: logging.Logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
     
-    # 清除已有的处理器（避免重复配置）
+    # 停止旧的监听器并清除已有的处理器（避免重复配置）
+    _stop_queue_listener()
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
     
@@ -196,13 +283,45 @@ def setup_logger() -> None:
     file_handler: HourlyDirectoryLogHandler = HourlyDirectoryLogHandler(log_dir=log_dir)
     file_handler.setFormatter(fmt=formatter)
     file_handler.setLevel(level=logging.INFO)
-    root_logger.addHandler(hdlr=file_handler)
+    
+    # 文件日志经内存缓冲批量写入，ERROR及以上级别立即刷新
+    _memory_handler = MemoryHandler(
+        capacity=LOG_BUFFER_CAPACITY,
+        flushLevel=logging.ERROR,
+        target=file_handler,
+        flushOnClose=True
+    )
+    _memory_handler.setLevel(level=logging.INFO)
     
     # 配置控制台日志处理器
     console_handler: StreamHandler = StreamHandler(stream=sys.stdout)
     console_handler.setFormatter(fmt=formatter)
     console_handler.setLevel(level=logging.INFO)
-    root_logger.addHandler(hdlr=console_handler)
+    
+    # 根日志记录器只入队，由后台监听线程分发到文件和控制台
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(-1)
+    root_logger.addHandler(hdlr=QueueHandler(queue=log_queue))
+    
+    _queue_listener = QueueListener(
+        log_queue,
+        _memory_handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    _queue_listener.start()
+    
+    # 定时刷新缓冲，保证低频日志也能及时落盘
+    _flush_stop_event = threading.Event()
+    threading.Thread(
+        target=_periodic_flush,
+        args=(_memory_handler, _flush_stop_event),
+        name='log-flush',
+        daemon=True
+    ).start()
+    
+    # 进程退出时停止监听器，确保队列和缓冲中剩余日志全部写出
+    atexit.unregister(_stop_queue_listener)
+    atexit.register(_stop_queue_listener)
     
     # 记录日志系统初始化成功
     root_logger.info("日志系统初始化完成")
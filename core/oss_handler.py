@@ -10,19 +10,19 @@ Date: 2025-01-14
 """
 
 import base64
+import functools
 import hashlib
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from configparser import ConfigParser, SectionProxy
-from urllib.parse import urljoin
 
 import alibabacloud_oss_v2 as oss
 import requests
-from Crypto.Cipher import AES
-from Crypto.Cipher._mode_cbc import CbcMode
-from Crypto.Util.Padding import pad, unpad
-from requests.adapters import HTTPAdapter
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from requests.sessions import Session
-from urllib3.util.retry import Retry
+
+from core.http_handler import get_shared_session
+from core.util_handler import derive_aes_key_iv, keep_remote_ts_paths
 
 # ============================================================================
 # 模块级日志记录器
@@ -30,6 +30,86 @@ from urllib3.util.retry import Retry
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+# AES分组大小（字节）
+AES_BLOCK_SIZE: int = 16
+
+# BLAKE2b路径指纹长度（字节），18字节恰好编码为24个Base64字符且无填充
+FINGERPRINT_DIGEST_SIZE: int = 18
+
+# 单个视频并发上传剧集的最大线程数
+EPISODE_MAX_WORKERS: int = 8
+
+# 剧集m3u8在OSS中的对象名
+M3U8_OBJECT_NAME: str = 'origin.m3u8'
+
+# 剧集数超过该值时，改用一次前缀列举代替逐个HEAD检查对象是否存在
+LIST_EXISTING_THRESHOLD: int = 5
+
+
+# ============================================================================
+# 加密工具函数
+# ============================================================================
+
+@functools.lru_cache(maxsize=32)
+def _get_cipher(key: bytes, iv: bytes) -> Cipher:
+    """
+    获取按 (key, iv) 缓存的AES-CBC密码对象
+    
+    Cipher 对象本身无状态，可在多个处理器实例和线程间共享；
+    每次加解密再通过 encryptor()/decryptor() 生成有状态的上下文。
+    
+    Args:
+        key: AES密钥
+        iv: 初始化向量
+        
+    Returns:
+        Cipher: AES-CBC密码对象
+    """
+    return Cipher(algorithms.AES(key), modes.CBC(iv))
+
+
+@functools.lru_cache(maxsize=8)
+def _get_oss_client(
+    access_key_id: str,
+    access_key_secret: str,
+    region: str,
+    endpoint: str,
+    connect_timeout: int,
+    readwrite_timeout: int
+) -> oss.Client:
+    """
+    获取按凭证、区域、端点和超时配置缓存的OSS客户端
+    
+    频繁创建处理器时避免重复加载默认配置和构建客户端。
+    
+    Args:
+        access_key_id: 访问密钥ID
+        access_key_secret: 访问密钥
+        region: OSS区域
+        endpoint: OSS访问端点
+        connect_timeout: 连接超时（秒）
+        readwrite_timeout: 读写超时（秒）
+        
+    Returns:
+        oss.Client: OSS客户端实例
+    """
+    credentials_provider: oss.credentials.CredentialsProvider = \
+        oss.credentials.StaticCredentialsProvider(
+            access_key_id=access_key_id,
+            access_key_secret=access_key_secret
+        )
+    
+    cfg: oss.config.Config = oss.config.load_default()
+    cfg.credentials_provider = credentials_provider
+    cfg.region = region
+    cfg.endpoint = endpoint
+    cfg.connect_timeout = connect_timeout
+    cfg.readwrite_timeout = readwrite_timeout
+    
+    client: oss.Client = oss.Client(config=cfg)
+    logger.debug("OSS客户端创建成功")
+    return client
+
 
 # ============================================================================
 # OSS处理器类
@@ -69,12 +149,13 @@ class OSSHandler:
         >>> oss_handler.close()
     """
     
-    def __init__(self, config: ConfigParser) -> None:
+    def __init__(self, config: ConfigParser, session: Session | None = None) -> None:
         """
         初始化OSS客户端及AES配置
         
         Args:
             config: 业务配置对象，需包含OSS密钥、Region等信息
+            session: 下载源文件使用的HTTP会话，由调用方持有；为None时使用进程级共享会话
             
         Raises:
             KeyError: 当配置中缺少必要的OSS配置项时抛出
@@ -101,81 +182,51 @@ class OSSHandler:
         if not self.endpoint:
             raise ValueError("OSS endpoint 不能为空")
         
-         # 创建凭证提供者
-        try:
-            credentials_provider: oss.credentials.CredentialsProvider = \
-                oss.credentials.StaticCredentialsProvider(
-                    access_key_id=access_key_id,
-                    access_key_secret=access_key_secret
-                )
-            logger.debug("OSS凭证提供者创建成功")
-        except Exception as e:
-            logger.error(f"创建OSS凭证提供者失败: {e}")
-            raise
-        
-        # 加载并配置OSS客户端
+        # 创建OSS客户端（相同凭证与端点的处理器复用同一客户端）
         try:
-            cfg: oss.config.Config = oss.config.load_default()
-            cfg.credentials_provider = credentials_provider
-            cfg.region = self.region
-            cfg.endpoint = self.endpoint
-            
-            # 可选：设置超时时间
-            cfg.connect_timeout = oss_config.getint('connect_timeout', fallback=60)
-            cfg.readwrite_timeout = oss_config.getint('readwrite_timeout', fallback=300)
-            cfg.connect_timeout = oss_config.getint('connect_timeout', fallback=60)
-            
-            self.client: oss.Client = oss.Client(config=cfg)
-            logger.debug("OSS客户端创建成功")
+            self.client: oss.Client = _get_oss_client(
+                access_key_id=access_key_id,
+                access_key_secret=access_key_secret,
+                region=self.region,
+                endpoint=self.endpoint,
+                connect_timeout=oss_config.getint('connect_timeout', fallback=60),
+                readwrite_timeout=oss_config.getint('readwrite_timeout', fallback=300)
+            )
         except Exception as e:
-            logger.error(f"创建OSS客户端失败: {e}")
+            logger.error("创建OSS客户端失败: %s", e)
             raise
         
         # 初始化AES加密配置
         self.encryption_key: str = oss_config.get('encryption_key', fallback='default_key_12345')
-        key_bytes: bytes = self.encryption_key.encode('utf-8')
-        self.aes_key: bytes = hashlib.sha256(key_bytes).digest()
-        self.aes_iv: bytes = hashlib.md5(key_bytes).digest()[:16]
-        
-        # 初始化HTTP会话
-        self.session: Session = self._setup_session()
-
-        # 超时配置
-        self.request_timeout: int = oss_config.getint('request_timeout', fallback=60)
-        
-        logger.info("OSS处理器初始化完成")
-    
-    def _setup_session(self) -> Session:
-        """
-        配置HTTP会话
+        self.aes_key: bytes
+        self.aes_iv: bytes
+        self.aes_key, self.aes_iv = derive_aes_key_iv(encryption_key=self.encryption_key)
         
-        设置连接池、重试策略和基础请求头。
+        # AES-CBC密码对象（进程内按密钥共享，加解密时再生成有状态的encryptor/decryptor）
+        self._aes: Cipher = _get_cipher(key=self.aes_key, iv=self.aes_iv)
         
-        Returns:
-            Session: 配置好的requests会话对象
-        """
-        session: Session = requests.Session()
+        # 路径名生成算法：aes（默认，兼容既有路径）或 blake2b（更快，但生成的路径不同）
+        self.path_hash: str = oss_config.get('path_hash', fallback='aes').strip().lower()
+        if self.path_hash == 'aes':
+            path_encoder = self._deterministic_aes_encrypt
+        elif self.path_hash == 'blake2b':
+            path_encoder = self._fingerprint
+        else:
+            raise ValueError(f"不支持的路径名生成算法: {self.path_hash}")
         
-        # 配置重试策略
-        retry_strategy: Retry = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
-        )
+        # 确定性加密结果缓存：同一视频的所有剧集和封面共享 title|douban_id 的密文
+        self._encrypt_cached = functools.lru_cache(maxsize=4096)(path_encoder)
         
-        # 配置HTTP适配器
-        adapter: HTTPAdapter = HTTPAdapter(
-            pool_connections=20,
-            pool_maxsize=20,
-            max_retries=retry_strategy
-        )
+        # HTTP会话：优先使用注入的会话，否则与其他处理器共用进程级会话
+        self.session: Session = session if session is not None else get_shared_session()
+
+        # 超时配置
+        self.request_timeout: int = oss_config.getint('request_timeout', fallback=60)
         
-        session.mount(prefix='http://', adapter=adapter)
-        session.mount(prefix='https://', adapter=adapter)
+        # 目标对象已存在时跳过上传（增量同步）
+        self.skip_existing: bool = oss_config.getboolean('skip_existing', fallback=True)
         
-        logger.debug("HTTP会话配置完成")
-        return session
+        logger.info("OSS处理器初始化完成")
     
     def generate_oss_key(
         self,
@@ -211,14 +262,14 @@ class OSSHandler:
             ... )
         """
         vod_str: str = f"{title}|{douban_id}"
-        vod_hex: str = self._deterministic_aes_encrypt(plaintext=vod_str)
+        vod_hex: str = self._encrypt_cached(vod_str)
         
         if resource_type == 'm3u8':
             if episode is None:
                 raise ValueError("m3u8类型必须提供episode参数")
             
             vod_ep_str: str = f"{title}|{douban_id}|{episode}"
-            vod_ep_hex: str = self._deterministic_aes_encrypt(plaintext=vod_ep_str)
+            vod_ep_hex: str = self._encrypt_cached(vod_ep_str)
             return f"{key}/{douban_id}/{vod_hex}/{episode}/{vod_ep_hex}"
             
         elif resource_type == 'cover':
@@ -230,16 +281,47 @@ class OSSHandler:
         """
         确定性AES加密（固定IV保证同一明文输出唯一）
         
+        生成对象Key时请通过 _encrypt_cached 调用，相同明文只加密一次。
+        
         Args:
             plaintext: 明文字符串
             
         Returns:
             str: Base64编码的加密字符串
+            
+        Note:
+            密文直接构成已上传对象的路径（并被站点数据引用），
+            加密模式（CBC+固定IV）、密钥派生和编码方式均不可更改，
+            否则所有既有视频的OSS路径都会失效
+        """
+        # 内联PKCS7填充
+        data: bytes = plaintext.encode('utf-8')
+        pad_len: int = AES_BLOCK_SIZE - len(data) % AES_BLOCK_SIZE
+        padded: bytes = data + bytes([pad_len]) * pad_len
+        
+        encryptor = self._aes.encryptor()
+        encrypted: bytes = encryptor.update(padded) + encryptor.finalize()
+        return base64.urlsafe_b64encode(encrypted).rstrip(b'=').decode('ascii')
+    
+    def _fingerprint(self, plaintext: str) -> str:
+        """
+        基于BLAKE2b的带密钥确定性路径指纹
+        
+        路径名只需确定且不可逆，无需解密；带密钥哈希无填充/IV处理，比AES-CBC更快。
+        仅在配置 path_hash = blake2b 时使用，生成的路径与AES方式不兼容。
+        
+        Args:
+            plaintext: 明文字符串
+            
+        Returns:
+            str: 24个字符的URL安全Base64指纹
         """
-        cipher: CbcMode = AES.new(key=self.aes_key, mode=AES.MODE_CBC, iv=self.aes_iv)
-        padded: bytes = pad(data_to_pad=plaintext.encode('utf-8'), block_size=AES.block_size)
-        encrypted: bytes = cipher.encrypt(padded)
-        return base64.urlsafe_b64encode(encrypted).decode('utf-8').rstrip('=')
+        digest: bytes = hashlib.blake2b(
+            plaintext.encode('utf-8'),
+            key=self.aes_key,
+            digest_size=FINGERPRINT_DIGEST_SIZE
+        ).digest()
+        return base64.urlsafe_b64encode(digest).decode('ascii')
     
     def _deterministic_aes_decrypt(self, encrypted_text: str) -> str:
         """
@@ -251,12 +333,17 @@ class OSSHandler:
         Returns:
             str: 解密后的明文
         """
-        cipher: CbcMode = AES.new(key=self.aes_key, mode=AES.MODE_CBC, iv=self.aes_iv)
         encrypted_data: bytes = base64.urlsafe_b64decode(
             encrypted_text + '=' * (4 - len(encrypted_text) % 4)
         )
-        plain_padded: bytes = cipher.decrypt(encrypted_data)
-        return unpad(padded_data=plain_padded, block_size=AES.block_size).decode('utf-8')
+        decryptor = self._aes.decryptor()
+        plain_padded: bytes = decryptor.update(encrypted_data) + decryptor.finalize()
+        
+        # 校验并去除PKCS7填充
+        pad_len: int = plain_padded[-1] if plain_padded else 0
+        if not 1 <= pad_len <= AES_BLOCK_SIZE or plain_padded[-pad_len:] != bytes([pad_len]) * pad_len:
+            raise ValueError("PKCS7填充无效")
+        return plain_padded[:-pad_len].decode('utf-8')
     
     def check_oss_object_exists(self, oss_key: str) -> bool:
         """
@@ -277,12 +364,55 @@ class OSSHandler:
                 key=oss_key
             )
             self.client.head_object(request=request)
-            logger.debug(f"OSS对象存在: {oss_key}")
+            logger.debug("OSS对象存在: %s", oss_key)
             return True
         except Exception as e:
-            logger.debug(f"OSS对象不存在: {oss_key}")
+            logger.debug("OSS对象不存在: %s", oss_key)
             return False
     
+    def list_existing_keys(self, prefix: str) -> set[str] | None:
+        """
+        列举指定前缀下已存在的OSS对象键名
+        
+        用一次分页列举代替N次HEAD请求，适合批量判断同一视频下的剧集是否已上传。
+        
+        Args:
+            prefix: OSS对象键名前缀
+            
+        Returns:
+            set[str] | None: 已存在的对象键名集合，列举失败返回None
+            
+        Example:
+            >>> existing = handler.list_existing_keys(prefix="video_data/12345/encrypted_path/")
+        """
+        try:
+            paginator = self.client.list_objects_v2_paginator()
+            existing: set[str] = set()
+            for page in paginator.iter_page(
+                oss.ListObjectsV2Request(bucket=self.bucket_name, prefix=prefix)
+            ):
+                for obj in page.contents or []:
+                    existing.add(obj.key)
+            return existing
+        except Exception as e:
+            logger.warning("列举OSS对象失败，回退为逐个检查: %s (prefix: %s)", e, prefix)
+            return None
+    
+    def _object_exists(self, oss_key: str, existing: set[str] | None = None) -> bool:
+        """
+        判断对象是否已存在（优先使用预先列举的结果）
+        
+        Args:
+            oss_key: OSS对象键名
+            existing: list_existing_keys 的结果，为None时发起HEAD请求
+            
+        Returns:
+            bool: 存在返回True，否则返回False
+        """
+        if existing is not None:
+            return oss_key in existing
+        return self.check_oss_object_exists(oss_key=oss_key)
+    
     def upload_m3u8_stream(self, m3u8_url: str, oss_base_key: str) -> bool:
         """
         上传m3u8文件到OSS（保留远程TS路径）
@@ -303,7 +433,7 @@ class OSSHandler:
         try:
             headers: dict[str, str] = {'User-Agent': 'Mozilla/5.0'}
             
-            logger.info(f"开始下载m3u8: {m3u8_url}")
+            logger.info("开始下载m3u8: %s", m3u8_url)
             response: requests.Response = self.session.get(
                 url=m3u8_url,
                 timeout=self.request_timeout,
@@ -312,32 +442,33 @@ class OSSHandler:
             )
             response.raise_for_status()
             
-            m3u8_content: str = response.text
+            # 直接在原始字节上处理，省去解码/重新编码
+            m3u8_content: bytes = response.content
             if not m3u8_content:
                 raise Exception("下载的m3u8内容为空")
             
             # 转换TS路径为绝对URL
-            modified_m3u8: str = self._keep_remote_ts_paths(
+            modified_m3u8: bytes = keep_remote_ts_paths(
                 m3u8_content=m3u8_content,
                 base_url=m3u8_url
             )
             
             # 构建OSS对象键名
-            oss_m3u8_key: str = f"{oss_base_key.rstrip('/')}/origin.m3u8"
+            oss_m3u8_key: str = f"{oss_base_key.rstrip('/')}/{M3U8_OBJECT_NAME}"
             
             # 上传到OSS
             request: oss.PutObjectRequest = oss.PutObjectRequest(
                 bucket=self.bucket_name,
                 key=oss_m3u8_key,
-                body=modified_m3u8.encode('utf-8')
+                body=modified_m3u8
             )
             result: oss.PutObjectResult = self.client.put_object(request=request)
             
-            logger.info(f"m3u8上传成功: {oss_m3u8_key}, ETag: {result.etag}")
+            logger.info("m3u8上传成功: %s, ETag: %s", oss_m3u8_key, result.etag)
             return True
             
         except Exception as e:
-            logger.error(f"上传m3u8到OSS失败: {e}")
+            logger.error("上传m3u8到OSS失败: %s", e)
             return False
     
     def upload_image_from_url(self, image_url: str, oss_key: str) -> bool:
@@ -360,28 +491,37 @@ class OSSHandler:
         try:
             headers: dict[str, str] = {'User-Agent': 'Mozilla/5.0'}
             
-            logger.info(f"开始下载图片: {image_url}")
-            response: requests.Response = self.session.get(
+            logger.info("开始下载图片: %s", image_url)
+            # 流式下载，边下载边上传，避免整张图片驻留内存
+            with self.session.get(
                 url=image_url,
                 timeout=self.request_timeout,
                 headers=headers,
-                verify=False
-            )
-            response.raise_for_status()
-            
-            # 上传到OSS
-            request: oss.PutObjectRequest = oss.PutObjectRequest(
-                bucket=self.bucket_name,
-                key=oss_key,
-                body=response.content
-            )
-            result: oss.PutObjectResult = self.client.put_object(request=request)
+                verify=False,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                
+                # 仅在未经传输压缩时，Content-Length 才等于解码后的实际长度
+                content_length: int | None = None
+                if 'Content-Length' in response.headers and 'Content-Encoding' not in response.headers:
+                    content_length = int(response.headers['Content-Length'])
+                
+                # 上传到OSS
+                request: oss.PutObjectRequest = oss.PutObjectRequest(
+                    bucket=self.bucket_name,
+                    key=oss_key,
+                    content_length=content_length,
+                    body=response.raw
+                )
+                result: oss.PutObjectResult = self.client.put_object(request=request)
             
-            logger.info(f"图片上传成功: {oss_key}, ETag: {result.etag}")
+            logger.info("图片上传成功: %s, ETag: %s", oss_key, result.etag)
             return True
             
         except Exception as e:
-            logger.error(f"图片上传OSS失败: {e}")
+            logger.error("图片上传OSS失败: %s", e)
             return False
     
     def process_single_video_sync(
@@ -412,41 +552,73 @@ class OSSHandler:
             ... )
         """
         try:
-            logger.info(f"开始同步视频到OSS: {title} (douban_id: {douban_id})")
+            logger.info("开始同步视频到OSS: %s (douban_id: %s)", title, douban_id)
             
-            # 上传所有剧集
+            episodes: list[tuple[int, str]] = []
             for index, m3u8_url in enumerate(video_list, start=1):
                 if not m3u8_url:
-                    logger.warning(f"跳过空的m3u8链接 (剧集 {index})")
+                    logger.warning("跳过空的m3u8链接 (剧集 %s)", index)
                     continue
-                
-                oss_key: str = self.generate_oss_key(
-                    title=title,
-                    key='video_data',
-                    douban_id=douban_id,
-                    resource_type='m3u8',
-                    episode=index
-                )
-                
-                if not self.upload_m3u8_stream(m3u8_url=m3u8_url, oss_base_key=oss_key):
-                    raise Exception(f"M3U8同步失败 (剧集 {index})")
+                episodes.append((index, m3u8_url))
             
-            # 上传封面
-            oss_key = self.generate_oss_key(
+            # 封面键名只生成一次，其所在目录即该视频的对象前缀
+            cover_key: str = self.generate_oss_key(
                 title=title,
                 key='video_data',
                 douban_id=douban_id,
                 resource_type='cover'
             )
             
-            if not self.upload_image_from_url(image_url=cover, oss_key=oss_key):
-                raise Exception("封面图片同步失败")
+            # 剧集较多时一次列举该视频目录，代替逐集HEAD请求
+            existing: set[str] | None = None
+            if self.skip_existing and len(episodes) > LIST_EXISTING_THRESHOLD:
+                existing = self.list_existing_keys(prefix=cover_key.rsplit('/', 1)[0] + '/')
             
-            logger.info(f"视频同步完成: {title} (douban_id: {douban_id})")
+            def _upload_one(index: int, m3u8_url: str) -> bool:
+                episode_key: str = self.generate_oss_key(
+                    title=title,
+                    key='video_data',
+                    douban_id=douban_id,
+                    resource_type='m3u8',
+                    episode=index
+                )
+                if self.skip_existing and self._object_exists(
+                    oss_key=f"{episode_key}/{M3U8_OBJECT_NAME}",
+                    existing=existing
+                ):
+                    logger.debug("剧集已存在，跳过上传: %s", episode_key)
+                    return True
+                return self.upload_m3u8_stream(m3u8_url=m3u8_url, oss_base_key=episode_key)
+            
+            def _upload_cover() -> bool:
+                if self.skip_existing and self._object_exists(oss_key=cover_key, existing=existing):
+                    logger.debug("封面已存在，跳过上传: %s", cover_key)
+                    return True
+                return self.upload_image_from_url(image_url=cover, oss_key=cover_key)
+            
+            # 封面与所有剧集在同一线程池中并发上传（每项均为独立的下载+上传，I/O密集），
+            # 封面最先提交，与剧集的下载/上传相互重叠
+            workers: int = min(EPISODE_MAX_WORKERS, len(episodes) + 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures: dict[Future[bool], int | None] = {executor.submit(_upload_cover): None}
+                for index, m3u8_url in episodes:
+                    futures[executor.submit(_upload_one, index, m3u8_url)] = index
+                
+                for future in as_completed(futures):
+                    if not future.result():
+                        # 取消尚未开始的任务，已在执行的任务会在退出时等待完成
+                        for pending in futures:
+                            pending.cancel()
+                        failed_index: int | None = futures[future]
+                        if failed_index is None:
+                            raise Exception("封面图片同步失败")
+                        raise Exception(f"M3U8同步失败 (剧集 {failed_index})")
+            
+            logger.info("视频同步完成: %s (douban_id: %s)", title, douban_id)
             return True
             
         except Exception as e:
-            logger.error(f"同步视频失败: {e}")
+            logger.error("同步视频失败: %s", e)
             return False
     
     def process_single_video_episode_sync(
@@ -480,7 +652,7 @@ class OSSHandler:
             ... )
         """
         try:
-            logger.info(f"开始同步单集到OSS: {title} 第{episode}集 (douban_id: {douban_id})")
+            logger.info("开始同步单集到OSS: %s 第%s集 (douban_id: %s)", title, episode, douban_id)
             
             # 上传剧集
             oss_key: str = self.generate_oss_key(
@@ -491,7 +663,11 @@ class OSSHandler:
                 episode=episode
             )
             
-            if not self.upload_m3u8_stream(m3u8_url=episode_url, oss_base_key=oss_key):
+            if self.skip_existing and self.check_oss_object_exists(
+                oss_key=f"{oss_key}/{M3U8_OBJECT_NAME}"
+            ):
+                logger.debug("剧集已存在，跳过上传: %s", oss_key)
+            elif not self.upload_m3u8_stream(m3u8_url=episode_url, oss_base_key=oss_key):
                 raise Exception("M3U8同步失败")
             
             # 上传封面
@@ -502,47 +678,18 @@ class OSSHandler:
                 resource_type='cover'
             )
             
-            if not self.upload_image_from_url(image_url=cover, oss_key=oss_key):
+            if self.skip_existing and self.check_oss_object_exists(oss_key=oss_key):
+                logger.debug("封面已存在，跳过上传: %s", oss_key)
+            elif not self.upload_image_from_url(image_url=cover, oss_key=oss_key):
                 raise Exception("封面图片同步失败")
             
-            logger.info(f"单集同步完成: {title} 第{episode}集 (douban_id: {douban_id})")
+            logger.info("单集同步完成: %s 第%s集 (douban_id: %s)", title, episode, douban_id)
             return True
             
         except Exception as e:
-            logger.error(f"同步剧集失败: {e}")
+            logger.error("同步剧集失败: %s", e)
             return False
     
-    def _keep_remote_ts_paths(self, m3u8_content: str, base_url: str) -> str:
-        """
-        保持TS分片的远程路径，转换为绝对URL
-        
-        Args:
-            m3u8_content: m3u8文件内容
-            base_url: 原始m3u8链接
-            
-        Returns:
-            str: 修改后的m3u8内容
-        """
-        lines: list[str] = m3u8_content.split('\n')
-        modified_lines: list[str] = []
-        
-        for line in lines:
-            stripped: str = line.strip()
-            
-            # 检查是否为TS分片行
-            if stripped and not stripped.startswith('#') and \
-               (stripped.endswith('.ts') or '/ts?' in stripped):
-                # 转换为绝对URL
-                if not stripped.startswith('http'):
-                    absolute_url: str = urljoin(base=base_url, url=stripped)
-                    modified_lines.append(absolute_url)
-                else:
-                    modified_lines.append(stripped)
-            else:
-                modified_lines.append(line)
-        
-        return '\n'.join(modified_lines)
-    
     def close(self) -> None:
         """
         释放资源
@@ -550,6 +697,5 @@ class OSSHandler:
         Example:
             >>> handler.close()
         """
-        if self.session:
-            self.session.close()
+        # 会话由调用方或进程级共享持有，此处不关闭
         logger.debug("OSS处理器资源已释放")
@@ -0,0 +1,85 @@
+"""
+请求限流组件
+
+提供线程安全的令牌桶限流器，用于在并发请求时控制第三方API的调用速率。
+
+Author: Qasim
+Version: 2.0
+Python: 3.11+
+Date: 2025-01-14
+"""
+
+import logging
+import threading
+import time
+
+# ============================================================================
+# 模块级日志记录器
+# ============================================================================
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# 令牌桶限流器
+# ============================================================================
+
+class TokenBucket:
+    """
+    令牌桶限流器
+    
+    令牌按 rate_per_sec 的速率持续补充，桶内最多积累 burst 个令牌；
+    每次请求前调用 acquire() 取走一个令牌，令牌不足时仅等待到下一个令牌生成，
+    请求本身耗时超过限流间隔时不再额外等待。多个线程可共享同一个限流器。
+    
+    Attributes:
+        rate_per_sec: 每秒补充的令牌数，小于等于0表示不限流
+        burst: 桶容量（允许的最大突发请求数）
+        _tokens: 当前可用令牌数
+        _updated_at: 上次补充令牌的单调时钟时间
+        _lock: 线程锁，保护令牌计数
+    
+    Example:
+        >>> bucket = TokenBucket(rate_per_sec=5, burst=10)
+        >>> bucket.acquire()
+        >>> response = session.post(url=url)
+    """
+    
+    def __init__(self, rate_per_sec: float, burst: int = 1) -> None:
+        """
+        初始化令牌桶
+        
+        Args:
+            rate_per_sec: 每秒补充的令牌数，小于等于0表示不限流
+            burst: 桶容量，初始时桶是满的
+        """
+        self.rate_per_sec: float = rate_per_sec
+        self.burst: int = max(1, burst)
+        self._tokens: float = float(self.burst)
+        self._updated_at: float = time.monotonic()
+        self._lock: threading.Lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """
+        取走一个令牌，令牌不足时阻塞等待
+        
+        等待发生在锁外，其他线程在此期间仍可预订后续令牌。
+        """
+        if self.rate_per_sec <= 0:
+            return
+        
+        with self._lock:
+            now: float = time.monotonic()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._updated_at) * self.rate_per_sec
+            )
+            self._updated_at = now
+            
+            # 先扣减再计算等待时间：令牌数为负表示已被预订，后来者依次顺延
+            self._tokens -= 1
+            wait: float = -self._tokens / self.rate_per_sec if self._tokens < 0 else 0.0
+        
+        if wait > 0:
+            logger.debug("请求限流，等待 %.3f 秒", wait)
+            time.sleep(wait)
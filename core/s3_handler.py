@@ -10,21 +10,25 @@ Date: 2025-01-14
 """
 
 import base64
+import functools
 import hashlib
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from configparser import ConfigParser, SectionProxy
-from urllib.parse import urljoin
 
 import boto3
 import requests
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from Crypto.Cipher import AES
-from Crypto.Cipher._mode_cbc import CbcMode
-from Crypto.Util.Padding import pad, unpad
-from requests.adapters import HTTPAdapter
+from Crypto.Cipher._mode_ecb import EcbMode
+from Crypto.Util.Padding import unpad
 from requests.sessions import Session
-from urllib3.util.retry import Retry
+
+from core.http_handler import get_shared_session
+from core.util_handler import derive_aes_key_iv, keep_remote_ts_paths
 
 # ============================================================================
 # 模块级日志记录器
@@ -33,6 +37,77 @@ from urllib3.util.retry import Retry
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+# ============================================================================
+# 常量定义
+# ============================================================================
+
+# 流式上传配置：超过分片阈值的对象自动使用并发分片上传
+TRANSFER_MULTIPART_SIZE: int = 8 * 1024 * 1024
+TRANSFER_MAX_CONCURRENCY: int = 8
+
+# 可选的传输客户端：auto（安装awscrt且为优化机型时使用CRT，否则为经典客户端）、classic
+TRANSFER_CLIENTS: tuple[str, ...] = ('auto', 'classic')
+
+# 单个视频并发上传剧集的最大线程数（不超过共享下载会话的连接池大小）
+EPISODE_MAX_WORKERS: int = 16
+
+# 剧集数超过该值时，先一次前缀列举再判断对象是否存在，代替逐个HEAD请求
+LIST_EXISTING_THRESHOLD: int = 5
+
+# HEAD/GET对象时表示"对象不存在"的错误代码
+_NOT_FOUND_CODES: frozenset[str] = frozenset({'404', 'NoSuchKey', 'NotFound'})
+
+
+# ============================================================================
+# 运行环境检查
+# ============================================================================
+
+@functools.cache
+def _check_aes_backend() -> bool:
+    """
+    检查pycryptodome是否使用AES-NI硬件加速（进程内只检查一次）
+    
+    未启用时仅输出警告，不阻止启动：软件实现结果一致，只是加密更慢。
+    
+    Returns:
+        bool: 已启用AES-NI返回True，否则返回False
+    """
+    try:
+        from Crypto.Util import _cpu_features
+        
+        has_aesni: bool = bool(_cpu_features.have_aes_ni()) \
+            and getattr(AES, '_raw_aesni_lib', None) is not None
+    except Exception as e:
+        logger.warning("无法检测AES-NI支持情况: %s", e)
+        return False
+    
+    if has_aesni:
+        logger.debug("pycryptodome已启用AES-NI硬件加速")
+    else:
+        logger.warning("pycryptodome未启用AES-NI硬件加速，对象路径加密将使用较慢的软件实现")
+    return has_aesni
+
+
+# ============================================================================
+# 加密工具函数
+# ============================================================================
+
+@functools.lru_cache(maxsize=8)
+def _get_ecb_cipher(key: bytes) -> EcbMode:
+    """
+    获取按密钥缓存的AES-ECB密码对象
+    
+    ECB对象不保存链接状态，密钥扩展结果可在多个处理器实例和线程间复用。
+    
+    Args:
+        key: AES密钥
+        
+    Returns:
+        EcbMode: AES-ECB密码对象
+    """
+    return AES.new(key=key, mode=AES.MODE_ECB)
+
+
 # ============================================================================
 # S3处理器类
 # ============================================================================
@@ -72,12 +147,13 @@ class S3Handler:
         >>> s3_handler.close()
     """
     
-    def __init__(self, config: ConfigParser) -> None:
+    def __init__(self, config: ConfigParser, session: Session | None = None) -> None:
         """
         初始化S3客户端及AES配置
         
         Args:
             config: 业务配置对象，需包含S3密钥、Region等信息
+            session: 下载源文件使用的HTTP会话，由调用方持有；为None时使用进程级共享会话
             
         Raises:
             KeyError: 当配置中缺少必要的S3配置项时抛出
@@ -106,11 +182,16 @@ class S3Handler:
         readwrite_timeout = s3_config.getint('readwrite_timeout', fallback=300)
         
         # 配置boto3客户端
+        # 仅在接口要求时计算请求体校验和，避免每次上传都额外扫描一遍请求体；
+        # HTTPS下签名不再对请求体做SHA-256（UNSIGNED-PAYLOAD），完整性由TLS保证，HTTP端点仍会签名
         botocore_config: Config = Config(
             max_pool_connections=100,
             retries={'max_attempts': 3, 'mode': 'standard'},
             read_timeout=readwrite_timeout,
-            connect_timeout=connect_timeout
+            connect_timeout=connect_timeout,
+            request_checksum_calculation='when_required',
+            signature_version='s3v4',
+            s3={'payload_signing_enabled': False}
         )
         
         # 初始化S3客户端
@@ -124,49 +205,46 @@ class S3Handler:
         
         # 初始化AES加密配置
         self.encryption_key: str = config.get('aws_s3', 'encryption_key', fallback='default_key_12345')
-        key_bytes: bytes = self.encryption_key.encode('utf-8')
-        self.aes_key: bytes = hashlib.sha256(key_bytes).digest()
-        self.aes_iv: bytes = hashlib.md5(key_bytes).digest()[:16]
+        self.aes_key: bytes
+        self.aes_iv: bytes
+        self.aes_key, self.aes_iv = derive_aes_key_iv(encryption_key=self.encryption_key)
         
-        # 超时配置
-        self.request_timeout: int = config.getint('aws_s3', 'request_timeout', fallback=60)
+        # 检查AES硬件加速是否可用
+        _check_aes_backend()
         
-        # 初始化HTTP会话
-        self.session: Session = self._setup_session()
+        # 预先构建的ECB密码对象（无状态，同一密钥在进程内只做一次密钥扩展），CBC链接在加解密时手动完成
+        self._aes_ecb: EcbMode = _get_ecb_cipher(key=self.aes_key)
+        self._aes_iv_int: int = int.from_bytes(self.aes_iv, 'big')
         
-        logger.info("S3处理器初始化完成")
-    
-    def _setup_session(self) -> Session:
-        """
-        配置HTTP会话
+        # 确定性加密结果缓存：同一视频的所有剧集和封面共享 title|douban_id 的密文
+        self._encrypt_cached = functools.lru_cache(maxsize=4096)(self._deterministic_aes_encrypt)
         
-        设置连接池、重试策略和基础请求头。
+        # 超时配置
+        self.request_timeout: int = config.getint('aws_s3', 'request_timeout', fallback=60)
         
-        Returns:
-            Session: 配置好的requests会话对象
-        """
-        session: Session = requests.Session()
+        # 目标对象已存在时跳过上传（增量同步）
+        self.skip_existing: bool = config.getboolean('aws_s3', 'skip_existing', fallback=True)
         
-        # 配置重试策略
-        retry_strategy: Retry = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
+        # 流式上传的传输客户端（auto 仅在安装 awscrt 且为优化机型时使用CRT，其余情况使用经典客户端）
+        transfer_client: str = config.get('aws_s3', 'transfer_client', fallback='auto').strip().lower()
+        if transfer_client not in TRANSFER_CLIENTS:
+            raise ValueError(f"不支持的S3传输客户端: {transfer_client}")
+        self.transfer_config: TransferConfig = TransferConfig(
+            multipart_threshold=TRANSFER_MULTIPART_SIZE,
+            multipart_chunksize=TRANSFER_MULTIPART_SIZE,
+            max_concurrency=TRANSFER_MAX_CONCURRENCY,
+            use_threads=True,
+            preferred_transfer_client=transfer_client
         )
         
-        # 配置HTTP适配器
-        adapter: HTTPAdapter = HTTPAdapter(
-            pool_connections=20,
-            pool_maxsize=20,
-            max_retries=retry_strategy,
-        )
+        # 对象存在性缓存：前缀 -> 该前缀下已存在的对象键名集合
+        self._exists_cache: dict[str, set[str]] = {}
+        self._exists_cache_lock: threading.Lock = threading.Lock()
         
-        session.mount(prefix='http://', adapter=adapter)
-        session.mount(prefix='https://', adapter=adapter)
+        # HTTP会话：优先使用注入的会话，否则与其他处理器共用进程级会话
+        self.session: Session = session if session is not None else get_shared_session()
         
-        logger.debug("HTTP会话配置完成")
-        return session
+        logger.info("S3处理器初始化完成")
     
     def generate_s3_key(
         self,
@@ -202,14 +280,14 @@ class S3Handler:
             ... )
         """
         vod_str: str = f"{title}|{douban_id}"
-        vod_hex: str = self._deterministic_aes_encrypt(plaintext=vod_str)
+        vod_hex: str = self._encrypt_cached(vod_str)
         
         if resource_type == 'm3u8':
             if episode is None:
                 raise ValueError("m3u8类型必须提供episode参数")
             
             vod_ep_str: str = f"{title}|{douban_id}|{episode}"
-            vod_ep_hex: str = self._deterministic_aes_encrypt(plaintext=vod_ep_str)
+            vod_ep_hex: str = self._encrypt_cached(vod_ep_str)
             return f"{key}/{douban_id}/{vod_hex}/{episode}/{vod_ep_hex}"
             
         elif resource_type == 'cover':
@@ -217,21 +295,112 @@ class S3Handler:
         else:
             raise ValueError(f"不支持的资源类型: {resource_type}")
     
+    def _generate_episode_keys(
+        self,
+        title: str,
+        douban_id: str,
+        key: str,
+        episodes: list[int]
+    ) -> list[str]:
+        """
+        批量生成多个剧集的m3u8对象Key，结果与逐集调用 generate_s3_key 一致
+        
+        Args:
+            title: 视频标题
+            douban_id: 豆瓣ID
+            key: 目录前缀
+            episodes: 剧集索引列表
+            
+        Returns:
+            list[str]: 与 episodes 顺序对应的对象键名列表
+        """
+        vod_hex: str = self._encrypt_cached(f"{title}|{douban_id}")
+        vod_ep_hexes: list[str] = self._aes_encrypt_many(
+            plaintexts=[f"{title}|{douban_id}|{episode}" for episode in episodes]
+        )
+        return [
+            f"{key}/{douban_id}/{vod_hex}/{episode}/{vod_ep_hex}"
+            for episode, vod_ep_hex in zip(episodes, vod_ep_hexes)
+        ]
+    
     def _deterministic_aes_encrypt(self, plaintext: str) -> str:
         """
         确定性AES加密（固定IV保证同一明文输出唯一）
         
+        使用预先构建的ECB密码对象逐块加密并手动异或前一密文块，
+        输出与 AES-CBC（固定IV）逐字节一致，但无需每次调用 AES.new。
+        生成对象Key时请通过 _encrypt_cached 调用，相同明文只加密一次。
+        
         Args:
             plaintext: 明文字符串
             
         Returns:
             str: Base64编码的加密字符串
         """
-        cipher: CbcMode = AES.new(key=self.aes_key, mode=AES.MODE_CBC, iv=self.aes_iv)
-        padded: bytes = pad(data_to_pad=plaintext.encode('utf-8'), block_size=AES.block_size)
-        encrypted: bytes = cipher.encrypt(padded)
+        # 内联PKCS7填充
+        data: bytes = plaintext.encode('utf-8')
+        pad_len: int = AES.block_size - len(data) % AES.block_size
+        padded: bytes = data + bytes([pad_len]) * pad_len
+        
+        # CBC链接：C[i] = E(P[i] ^ C[i-1])，C[-1] = IV
+        encrypted: bytearray = bytearray()
+        previous: int = self._aes_iv_int
+        for offset in range(0, len(padded), AES.block_size):
+            block: int = int.from_bytes(padded[offset:offset + AES.block_size], 'big') ^ previous
+            cipher_block: bytes = self._aes_ecb.encrypt(block.to_bytes(AES.block_size, 'big'))
+            encrypted += cipher_block
+            previous = int.from_bytes(cipher_block, 'big')
+        
         return base64.urlsafe_b64encode(encrypted).decode('utf-8').rstrip('=')
     
+    def _aes_encrypt_many(self, plaintexts: list[str]) -> list[str]:
+        """
+        批量确定性AES加密，结果与逐个调用 _deterministic_aes_encrypt 一致
+        
+        CBC的后一密文块依赖前一密文块，同一明文内无法一次加密；
+        因此按块序号分层：所有明文的第k块拼接后只调用一次ECB加密，
+        C函数调用次数由总块数降为最长明文的块数。
+        
+        Args:
+            plaintexts: 明文字符串列表
+            
+        Returns:
+            list[str]: 与输入顺序对应的Base64编码加密字符串列表
+        """
+        block_size: int = AES.block_size
+        padded_list: list[bytes] = []
+        for plaintext in plaintexts:
+            data: bytes = plaintext.encode('utf-8')
+            pad_len: int = block_size - len(data) % block_size
+            padded_list.append(data + bytes([pad_len]) * pad_len)
+        
+        encrypted_list: list[bytearray] = [bytearray() for _ in padded_list]
+        previous: list[bytes] = [self.aes_iv] * len(padded_list)
+        offset: int = 0
+        while True:
+            # 本层仍有数据块的明文
+            active: list[int] = [i for i, padded in enumerate(padded_list) if offset < len(padded)]
+            if not active:
+                break
+            
+            plain_layer: bytes = b''.join(padded_list[i][offset:offset + block_size] for i in active)
+            chain_layer: bytes = b''.join(previous[i] for i in active)
+            cipher_layer: bytes = self._aes_ecb.encrypt(
+                (int.from_bytes(plain_layer, 'big') ^ int.from_bytes(chain_layer, 'big'))
+                .to_bytes(len(plain_layer), 'big')
+            )
+            
+            for position, i in enumerate(active):
+                cipher_block: bytes = cipher_layer[position * block_size:(position + 1) * block_size]
+                encrypted_list[i] += cipher_block
+                previous[i] = cipher_block
+            offset += block_size
+        
+        return [
+            base64.urlsafe_b64encode(encrypted).decode('utf-8').rstrip('=')
+            for encrypted in encrypted_list
+        ]
+    
     def _deterministic_aes_decrypt(self, encrypted_text: str) -> str:
         """
         解密AES密文
@@ -242,17 +411,24 @@ class S3Handler:
         Returns:
             str: 解密后的明文
         """
-        cipher: CbcMode = AES.new(key=self.aes_key, mode=AES.MODE_CBC, iv=self.aes_iv)
         encrypted_data: bytes = base64.urlsafe_b64decode(
             encrypted_text + '=' * (4 - len(encrypted_text) % 4)
         )
-        plain_padded: bytes = cipher.decrypt(encrypted_data)
+        
+        # CBC解密可整体完成：P = D(C) ^ (IV || C[:-1])
+        chained: bytes = self.aes_iv + encrypted_data[:-AES.block_size]
+        plain_padded: bytes = (
+            int.from_bytes(self._aes_ecb.decrypt(encrypted_data), 'big')
+            ^ int.from_bytes(chained, 'big')
+        ).to_bytes(len(encrypted_data), 'big')
         return unpad(padded_data=plain_padded, block_size=AES.block_size).decode('utf-8')
     
     def check_s3_object_exists(self, s3_key: str) -> bool:
         """
         检查S3对象是否存在
         
+        若对象所在前缀已通过 _prefetch_existing 预取，则直接查内存缓存。
+        
         Args:
             s3_key: S3对象键名
             
@@ -262,26 +438,78 @@ class S3Handler:
         Example:
             >>> exists = handler.check_s3_object_exists(s3_key="path/to/file.jpg")
         """
+        # 已预取的前缀直接查缓存，无需HEAD请求
+        cached: bool | None = self._lookup_exists_cache(s3_key=s3_key)
+        if cached is not None:
+            return cached
+        
         try:
             self.s3.head_object(Bucket=self.bucket_name, Key=s3_key)
-            logger.debug(f"S3对象存在: {s3_key}")
+            logger.debug("S3对象存在: %s", s3_key)
             return True
         except ClientError as e:
-            # 获取错误代码
-            error_code: str = e.response.get('Error', {}).get('Code', '')
+            # HEAD请求没有响应体，botocore以HTTP状态码作为错误代码，不会抛出类型化的NoSuchKey
+            error_code: str = e.response['Error'].get('Code', '')
             
-            if error_code == '404' or error_code == 'NoSuchKey':
-                logger.debug(f"S3对象不存在: {s3_key}")
+            if error_code in _NOT_FOUND_CODES:
+                logger.debug("S3对象不存在: %s", s3_key)
                 return False
             else:
                 # 其他错误（如权限问题）记录日志
-                logger.error(f"检查S3对象时发生错误 ({error_code}): {e}")
+                logger.error("检查S3对象时发生错误 (%s): %s", error_code, e)
                 return False
         except Exception as e:
             # 捕获其他非预期异常
-            logger.error(f"检查S3对象时发生未知错误: {e}")
+            logger.error("检查S3对象时发生未知错误: %s", e)
             return False
     
+    def _prefetch_existing(self, prefix: str) -> None:
+        """
+        一次分页列举指定前缀下的所有对象并缓存，供后续存在性检查使用
+        
+        列举失败时不写缓存，存在性检查回退为逐个HEAD请求。
+        
+        Args:
+            prefix: S3对象键名前缀
+        """
+        try:
+            keys: set[str] = set()
+            paginator = self.s3.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                keys.update(obj['Key'] for obj in page.get('Contents', []))
+        except Exception as e:
+            logger.warning("列举S3对象失败，回退为逐个检查: %s (prefix: %s)", e, prefix)
+            return
+        
+        with self._exists_cache_lock:
+            self._exists_cache[prefix] = keys
+    
+    def _lookup_exists_cache(self, s3_key: str) -> bool | None:
+        """
+        在存在性缓存中查找对象
+        
+        Args:
+            s3_key: S3对象键名
+            
+        Returns:
+            bool | None: 所在前缀已缓存时返回是否存在，未缓存返回None
+        """
+        with self._exists_cache_lock:
+            for prefix, keys in self._exists_cache.items():
+                if s3_key.startswith(prefix):
+                    return s3_key in keys
+        return None
+    
+    def _release_existing(self, prefix: str) -> None:
+        """
+        释放指定前缀的存在性缓存
+        
+        Args:
+            prefix: S3对象键名前缀
+        """
+        with self._exists_cache_lock:
+            self._exists_cache.pop(prefix, None)
+    
     def upload_m3u8_stream(self, m3u8_url: str, s3_base_key: str) -> bool:
         """
         上传m3u8文件到S3（保留远程TS路径）
@@ -304,7 +532,7 @@ class S3Handler:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            logger.info(f"开始下载m3u8: {m3u8_url}")
+            logger.info("开始下载m3u8: %s", m3u8_url)
             response: requests.Response = self.session.get(
                 url=m3u8_url,
                 timeout=self.request_timeout,
@@ -313,12 +541,13 @@ class S3Handler:
             )
             response.raise_for_status()
             
-            m3u8_content: str = response.text
+            # 直接在原始字节上处理，省去解码/重新编码
+            m3u8_content: bytes = response.content
             if not m3u8_content:
                 raise Exception("下载的m3u8内容为空")
             
             # 转换TS路径为绝对URL
-            modified_m3u8: str = self._keep_remote_ts_paths(
+            modified_m3u8: bytes = keep_remote_ts_paths(
                 m3u8_content=m3u8_content,
                 base_url=m3u8_url
             )
@@ -326,19 +555,20 @@ class S3Handler:
             # 构建S3对象键名
             m3u8_s3_key: str = f"{s3_base_key.rstrip('/')}/origin.m3u8"
             
-            # 上传到S3
+            # 上传到S3（附带Content-MD5，服务端据此校验完整性）
             self.s3.put_object(
                 Bucket=self.bucket_name,
                 Key=m3u8_s3_key,
-                Body=modified_m3u8.encode('utf-8'),
+                Body=modified_m3u8,
+                ContentMD5=base64.b64encode(hashlib.md5(modified_m3u8).digest()).decode('ascii'),
                 ContentType='application/vnd.apple.mpegurl'
             )
             
-            logger.info(f"m3u8上传成功: {m3u8_s3_key}")
+            logger.info("m3u8上传成功: %s", m3u8_s3_key)
             return True
             
         except Exception as e:
-            logger.error(f"上传m3u8到S3失败: {e}")
+            logger.error("上传m3u8到S3失败: %s", e)
             return False
     
     def upload_image_from_url(self, image_url: str, s3_key: str) -> bool:
@@ -363,31 +593,35 @@ class S3Handler:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            logger.info(f"开始下载图片: {image_url}")
-            response: requests.Response = self.session.get(
+            logger.info("开始下载图片: %s", image_url)
+            # 流式下载，边下载边上传，避免整张图片驻留内存
+            with self.session.get(
                 url=image_url,
                 timeout=30,
                 verify=False,
-                headers=headers
-            )
-            response.raise_for_status()
-            
-            # 获取内容类型
-            content_type: str = response.headers.get('content-type', 'image/jpeg')
-            
-            # 上传到S3
-            self.s3.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=response.content,
-                ContentType=content_type
-            )
+                headers=headers,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                
+                # 获取内容类型
+                content_type: str = response.headers.get('content-type', 'image/jpeg')
+                
+                # 上传到S3
+                self.s3.upload_fileobj(
+                    Fileobj=response.raw,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    ExtraArgs={'ContentType': content_type},
+                    Config=self.transfer_config
+                )
             
-            logger.info(f"图片上传成功: {s3_key}")
+            logger.info("图片上传成功: %s", s3_key)
             return True
             
         except Exception as e:
-            logger.error(f"图片上传S3失败: {e}")
+            logger.error("图片上传S3失败: %s", e)
             return False
     
     def process_single_video_sync(
@@ -417,43 +651,103 @@ class S3Handler:
             ...     cover="https://example.com/cover.jpg"
             ... )
         """
+        video_prefix: str | None = None
         try:
-            logger.info(f"开始同步视频到S3: {title} (douban_id: {douban_id})")
+            logger.info("开始同步视频到S3: %s (douban_id: %s)", title, douban_id)
             
-            # 上传所有剧集
+            episodes: list[tuple[int, str]] = []
             for index, m3u8_url in enumerate(video_list, start=1):
                 if not m3u8_url:
-                    logger.warning(f"跳过空的m3u8链接 (剧集 {index})")
+                    logger.warning("跳过空的m3u8链接 (剧集 %s)", index)
                     continue
-                
-                s3_key: str = self.generate_s3_key(
-                    title=title,
-                    key='video_data',
-                    douban_id=str(douban_id),
-                    resource_type='m3u8',
-                    episode=index
-                )
-                
-                if not self.upload_m3u8_stream(m3u8_url=m3u8_url, s3_base_key=s3_key):
-                    raise Exception(f"M3U8同步失败 (剧集 {index})")
+                episodes.append((index, m3u8_url))
             
-            # 上传封面
-            s3_key = self.generate_s3_key(
+            # 封面键名只生成一次，其所在目录即该视频的对象前缀
+            cover_key: str = self.generate_s3_key(
                 title=title,
                 key='video_data',
                 douban_id=str(douban_id),
                 resource_type='cover'
             )
             
-            if not self.upload_image_from_url(image_url=cover, s3_key=s3_key):
-                raise Exception("封面图片同步失败")
+            # 所有剧集的对象键名批量加密生成
+            episode_keys: list[str] = self._generate_episode_keys(
+                title=title,
+                douban_id=str(douban_id),
+                key='video_data',
+                episodes=[index for index, _ in episodes]
+            )
             
-            logger.info(f"视频同步完成: {title} (douban_id: {douban_id})")
+            # 剧集较多时一次列举该视频目录，代替逐集HEAD请求
+            if self.skip_existing and len(episodes) > LIST_EXISTING_THRESHOLD:
+                video_prefix = cover_key.rsplit('/', 1)[0] + '/'
+                self._prefetch_existing(prefix=video_prefix)
+            
+            # 封面与所有剧集在同一线程池中并发上传（boto3客户端线程安全，下载共用同一会话连接池），
+            # 封面最先提交，不必等待全部剧集完成
+            workers: int = min(EPISODE_MAX_WORKERS, len(episodes) + 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures: dict[Future[bool], int | None] = {
+                    executor.submit(self._upload_cover, cover=cover, cover_key=cover_key): None
+                }
+                for (index, m3u8_url), episode_key in zip(episodes, episode_keys):
+                    futures[executor.submit(
+                        self._upload_one_episode,
+                        s3_key=episode_key,
+                        m3u8_url=m3u8_url
+                    )] = index
+                
+                for future in as_completed(futures):
+                    if not future.result():
+                        # 取消尚未开始的任务，已在执行的任务会在退出时等待完成
+                        for pending in futures:
+                            pending.cancel()
+                        failed_index: int | None = futures[future]
+                        if failed_index is None:
+                            raise Exception("封面图片同步失败")
+                        raise Exception(f"M3U8同步失败 (剧集 {failed_index})")
+            
+            logger.info("视频同步完成: %s (douban_id: %s)", title, douban_id)
             return True
             
         except Exception as e:
-            logger.error(f"同步视频失败: {e}")
+            logger.error("同步视频失败: %s", e)
             return False
+        finally:
+            if video_prefix is not None:
+                self._release_existing(prefix=video_prefix)
+    
+    def _upload_cover(self, cover: str, cover_key: str) -> bool:
+        """
+        上传视频封面（供线程池并发调用，已存在时跳过）
+        
+        Args:
+            cover: 封面图片链接
+            cover_key: 封面S3键名
+            
+        Returns:
+            bool: 上传成功返回True，失败返回False
+        """
+        if self.skip_existing and self.check_s3_object_exists(s3_key=cover_key):
+            logger.debug("封面已存在，跳过上传: %s", cover_key)
+            return True
+        return self.upload_image_from_url(image_url=cover, s3_key=cover_key)
+    
+    def _upload_one_episode(self, s3_key: str, m3u8_url: str) -> bool:
+        """
+        上传 video_data 目录下的单个剧集m3u8（供线程池并发调用，已存在时跳过）
+        
+        Args:
+            s3_key: 剧集对象键名（由 _generate_episode_keys 预先生成）
+            m3u8_url: m3u8在线地址
+            
+        Returns:
+            bool: 上传成功返回True，失败返回False
+        """
+        if self.skip_existing and self.check_s3_object_exists(s3_key=f"{s3_key}/origin.m3u8"):
+            logger.debug("剧集已存在，跳过上传: %s", s3_key)
+            return True
+        return self.upload_m3u8_stream(m3u8_url=m3u8_url, s3_base_key=s3_key)
     
     def process_single_video_episode_sync(
         self,
@@ -486,7 +780,7 @@ class S3Handler:
             ... )
         """
         try:
-            logger.info(f"开始同步单集到S3: {title} 第{episode}集 (douban_id: {douban_id})")
+            logger.info("开始同步单集到S3: %s 第%s集 (douban_id: %s)", title, episode, douban_id)
             
             # 上传剧集
             s3_key: str = self.generate_s3_key(
@@ -497,7 +791,9 @@ class S3Handler:
                 episode=episode
             )
             
-            if not self.upload_m3u8_stream(m3u8_url=episode_url, s3_base_key=s3_key):
+            if self.skip_existing and self.check_s3_object_exists(s3_key=f"{s3_key}/origin.m3u8"):
+                logger.debug("剧集已存在，跳过上传: %s", s3_key)
+            elif not self.upload_m3u8_stream(m3u8_url=episode_url, s3_base_key=s3_key):
                 raise Exception("M3U8同步失败")
             
             # 上传封面
@@ -508,47 +804,18 @@ class S3Handler:
                 resource_type='cover'
             )
             
-            if not self.upload_image_from_url(image_url=cover, s3_key=s3_key):
+            if self.skip_existing and self.check_s3_object_exists(s3_key=s3_key):
+                logger.debug("封面已存在，跳过上传: %s", s3_key)
+            elif not self.upload_image_from_url(image_url=cover, s3_key=s3_key):
                 raise Exception("封面图片同步失败")
             
-            logger.info(f"单集同步完成: {title} 第{episode}集 (douban_id: {douban_id})")
+            logger.info("单集同步完成: %s 第%s集 (douban_id: %s)", title, episode, douban_id)
             return True
             
         except Exception as e:
-            logger.error(f"同步剧集失败: {e}")
+            logger.error("同步剧集失败: %s", e)
             return False
     
-    def _keep_remote_ts_paths(self, m3u8_content: str, base_url: str) -> str:
-        """
-        保持TS分片的远程路径，转换为绝对URL
-        
-        Args:
-            m3u8_content: m3u8文件内容
-            base_url: 原始m3u8链接
-            
-        Returns:
-            str: 修改后的m3u8内容
-        """
-        lines: list[str] = m3u8_content.split('\n')
-        modified_lines: list[str] = []
-        
-        for line in lines:
-            stripped: str = line.strip()
-            
-            # 检查是否为TS分片行
-            if stripped and not stripped.startswith('#') and \
-               (stripped.endswith('.ts') or '/ts?' in stripped):
-                # 转换为绝对URL
-                if not stripped.startswith('http'):
-                    absolute_url: str = urljoin(base=base_url, url=stripped)
-                    modified_lines.append(absolute_url)
-                else:
-                    modified_lines.append(stripped)
-            else:
-                modified_lines.append(line)
-        
-        return '\n'.join(modified_lines)
-    
     def close(self) -> None:
         """
         释放资源
@@ -556,6 +823,5 @@ class S3Handler:
         Example:
             >>> handler.close()
         """
-        if self.session:
-            self.session.close()
+        # 会话由调用方或进程级共享持有，此处不关闭
         logger.debug("S3处理器资源已释放")
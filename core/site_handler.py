@@ -10,16 +10,19 @@ Date: 2025-01-14
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from typing import Any
 from urllib.parse import urljoin
 
+import orjson
 import requests
-import json
 from requests.adapters import HTTPAdapter
 from requests.sessions import Session
 from urllib3.util.retry import Retry
 
+from core.http_handler import KeepAliveHTTPAdapter
+
 # ============================================================================
 # 模块级日志记录器
 # ============================================================================
@@ -27,6 +30,34 @@ from urllib3.util.retry import Retry
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+# ============================================================================
+# 常量定义
+# ============================================================================
+
+# HTTP连接池下限（按目标域名数量放大）
+POOL_MIN_SIZE: int = 32
+
+# 同步数据序列化选项：日期时间交给 default 处理（与原 json.dumps(default=str) 输出一致）
+_ORJSON_OPTIONS: int = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+# ============================================================================
+# 工具函数
+# ============================================================================
+
+def _json_default(obj: Any) -> str:
+    """
+    orjson无法直接序列化的类型（datetime、Decimal等）统一转为字符串
+    
+    Args:
+        obj: 待序列化对象
+        
+    Returns:
+        str: 对象的字符串形式
+    """
+    return str(obj)
+
+
 # ============================================================================
 # 站点处理器类
 # ============================================================================
@@ -49,6 +80,7 @@ class SiteHandler:
         sync_endpoint: 同步接口端点
         clean_endpoint: 清理接口端点
         request_timeout: 请求超时时间（秒）
+        sync_batch_size: 单个同步请求携带的视频数量上限
         domains: 目标站点域名列表
         session: HTTP会话对象
         
@@ -76,6 +108,19 @@ class SiteHandler:
         self.clean_endpoint: str = config.get('site', 'clean_endpoint', fallback='/api/clean')
         self.request_timeout: int = config.getint('site', 'timeout', fallback=30)
         
+        # 单个同步请求携带的视频数量上限，超出时分批发送
+        self.sync_batch_size: int = max(1, config.getint('site', 'sync_batch_size', fallback=50))
+        
+        # SSL证书验证：默认关闭以兼容自签名证书的站点，开启后使用requests内置的certifi CA证书包；
+        # 需在每个请求上显式传入（会话级 verify 会被 REQUESTS_CA_BUNDLE/CURL_CA_BUNDLE 环境变量覆盖）
+        self.verify_ssl: bool = config.getboolean('site', 'verify_ssl', fallback=False)
+        
+        # videos_data 编码方式：string（默认，JSON字符串嵌套在请求体中，兼容现有站点接口）
+        # 或 object（直接作为JSON数组发送，避免二次转义，需站点接口支持）
+        self.videos_data_format: str = config.get('site', 'videos_data_format', fallback='string').strip().lower()
+        if self.videos_data_format not in ('string', 'object'):
+            raise ValueError(f"不支持的 videos_data_format: {self.videos_data_format}")
+        
         # 解析域名列表
         domains_str: str = config.get('site', 'domains', fallback='')
         self.domains: list[str] = [
@@ -93,7 +138,10 @@ class SiteHandler:
         """
         初始化HTTP会话
         
-        配置连接池、重试策略和认证头。
+        配置连接池、重试策略和认证头，启用TCP Keep-Alive，
+        连接池按域名数量放大，重复同步到同一批域名时复用已握手的连接。
+        
+        会话携带站点认证头，因此不与下载源文件的共享会话合用。
         
         Returns:
             Session: 配置好的requests会话对象
@@ -108,10 +156,10 @@ class SiteHandler:
             allowed_methods=["GET", "POST"]
         )
         
-        # 配置HTTP适配器
-        adapter: HTTPAdapter = HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=10,
+        # 配置HTTP适配器（启用TCP Keep-Alive）
+        adapter: HTTPAdapter = KeepAliveHTTPAdapter(
+            pool_connections=max(POOL_MIN_SIZE, len(self.domains)),
+            pool_maxsize=max(POOL_MIN_SIZE, len(self.domains) * 4),
             max_retries=retry_strategy
         )
         
@@ -122,7 +170,8 @@ class SiteHandler:
         session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Content-Type': 'application/json',
-            'Authorization': f"Bearer {self.api_token}"
+            'Authorization': f"Bearer {self.api_token}",
+            'Connection': 'keep-alive'
         })
         
         logger.debug("HTTP会话配置完成")
@@ -145,17 +194,42 @@ class SiteHandler:
             >>> ids = handler._extract_video_ids(batch_videos=videos)
             >>> print(ids)  # ['123', '456']
         """
-        video_ids: list[str] = []
-        
-        for video in batch_videos:
-            # 确保ID存在且转换为字符串
-            video_id: Any = video.get('vod_douban_id')
-            if video_id is not None:
-                video_ids.append(str(video_id))
+        # 确保ID存在且转换为字符串
+        video_ids: list[str] = [
+            str(video_id) for video in batch_videos
+            if (video_id := video.get('vod_douban_id')) is not None
+        ]
         
         logger.debug(f"提取视频ID数量: {len(video_ids)}")
         return video_ids
     
+    def _build_sync_payload(self, videos: list[dict[str, Any]]) -> bytes:
+        """
+        序列化同步请求体
+        
+        使用orjson序列化；默认保持 videos_data 为JSON字符串的接口约定，
+        配置 videos_data_format = object 时直接发送数组，省去二次编码与转义。
+        
+        Args:
+            videos: 待同步的视频数据列表
+            
+        Returns:
+            bytes: UTF-8编码的JSON请求体
+        """
+        if self.videos_data_format == 'object':
+            return orjson.dumps(
+                {"videos_data": videos},
+                default=_json_default,
+                option=_ORJSON_OPTIONS
+            )
+        
+        videos_json: str = orjson.dumps(
+            videos,
+            default=_json_default,
+            option=_ORJSON_OPTIONS
+        ).decode('utf-8')
+        return orjson.dumps({"videos_data": videos_json})
+    
     def sync_videos_to_site(
         self,
         videos: list[dict[str, Any]],
@@ -164,7 +238,8 @@ class SiteHandler:
         """
         同步视频数据到目标站点
         
-        支持单个域名或配置中的所有域名同步，返回按域名分组的同步失败记录。
+        支持单个域名或配置中的所有域名同步，多个域名并发请求，返回按域名分组的同步失败记录。
+        视频按 sync_batch_size 分批，每批请求体只序列化一次，各域名依次发送各批。
         
         Args:
             videos: 待同步的视频数据列表
@@ -186,45 +261,115 @@ class SiteHandler:
             logger.warning("未配置目标站点域名，同步终止")
             return failed
         
-        # 提取所有视频ID用于失败记录
-        all_video_ids: list[str] = self._extract_video_ids(batch_videos=videos)
-        video_id_set: set[str] = set(all_video_ids)
+        # 按批序列化请求体，各域名共用；序列化失败的批次直接记为所有域名失败
+        batches: list[tuple[bytes, int, set[str]]] = []
+        unserializable_ids: set[str] = set()
         
-        # 遍历每个域名进行同步
-        for target_domain in target_domains:
+        for start in range(0, len(videos), self.sync_batch_size):
+            batch_videos: list[dict[str, Any]] = videos[start:start + self.sync_batch_size]
+            video_id_set: set[str] = set(self._extract_video_ids(batch_videos=batch_videos))
+            
             try:
-                sync_url: str = urljoin(base=target_domain, url=self.sync_endpoint)
-                logger.info(f"开始同步 {len(videos)} 条数据到 {target_domain}")
-                
-                response: requests.Response = self.session.post(
-                    url=sync_url,
-                    json={"videos_data": json.dumps(videos, default=str)},
-                    timeout=self.request_timeout,
-                    verify=False  # 注意：生产环境建议改为True并配置CA证书
-                )
-                
-                response.raise_for_status()
-                
-                # API直接返回失败的视频ID列表
-                failed_ids: list = response.json()
-                
-                if failed_ids:
-                    logger.warning(f"{target_domain} 同步部分失败，失败数量: {len(failed_ids)}")
-                    # 将列表转换为字符串集合
-                    failed[target_domain] = set(str(vid) for vid in failed_ids)
-                else:
-                    logger.info(f"{target_domain} 同步成功，处理 {len(videos)} 条数据")
-                    failed[target_domain] = set()  # 成功则失败集合为空
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"{target_domain} 同步请求失败: {str(e)}")
-                failed[target_domain] = video_id_set.copy()  # 请求失败记录所有ID
+                payload: bytes = self._build_sync_payload(videos=batch_videos)
             except Exception as e:
-                logger.error(f"{target_domain} 同步异常: {str(e)}")
-                failed[target_domain] = video_id_set.copy()  # 其他异常记录所有ID
+                logger.error(f"同步数据序列化失败: {str(e)}")
+                unserializable_ids.update(video_id_set)
+                continue
+            
+            batches.append((payload, len(batch_videos), video_id_set))
+        
+        # 各域名的同步请求相互独立，并发发送，耗时由各域名之和降为最慢的一个
+        with ThreadPoolExecutor(max_workers=len(target_domains)) as executor:
+            domain_failed: list[set[str]] = list(executor.map(
+                lambda target_domain: self._sync_domain(
+                    target_domain=target_domain,
+                    batches=batches
+                ),
+                target_domains
+            ))
+        
+        for target_domain, failed_ids in zip(target_domains, domain_failed):
+            failed[target_domain] = failed_ids | unserializable_ids
         
         return failed
     
+    def _sync_domain(
+        self,
+        target_domain: str,
+        batches: list[tuple[bytes, int, set[str]]]
+    ) -> set[str]:
+        """
+        依次发送各批同步请求到单个域名（供线程池并发调用）
+        
+        Args:
+            target_domain: 目标站点域名
+            batches: (请求体, 视频数量, 视频ID集合) 列表
+            
+        Returns:
+            set[str]: 该域名同步失败的视频ID集合，全部成功时为空集合
+        """
+        failed_ids: set[str] = set()
+        
+        for payload, video_count, video_id_set in batches:
+            failed_ids.update(self._sync_one(
+                target_domain=target_domain,
+                payload=payload,
+                video_count=video_count,
+                video_id_set=video_id_set
+            ))
+        
+        return failed_ids
+    
+    def _sync_one(
+        self,
+        target_domain: str,
+        payload: bytes,
+        video_count: int,
+        video_id_set: set[str]
+    ) -> set[str]:
+        """
+        同步视频数据到单个域名（供线程池并发调用）
+        
+        Args:
+            target_domain: 目标站点域名
+            payload: 已序列化的JSON请求体
+            video_count: 本次同步的视频数量（用于日志）
+            video_id_set: 本次同步的全部视频ID，请求失败时整体记为失败
+            
+        Returns:
+            set[str]: 该域名同步失败的视频ID集合，全部成功时为空集合
+        """
+        try:
+            sync_url: str = urljoin(base=target_domain, url=self.sync_endpoint)
+            logger.info(f"开始同步 {video_count} 条数据到 {target_domain}")
+            
+            response: requests.Response = self.session.post(
+                url=sync_url,
+                data=payload,
+                timeout=self.request_timeout,
+                verify=self.verify_ssl
+            )
+            
+            response.raise_for_status()
+            
+            # API直接返回失败的视频ID列表
+            failed_ids: list = response.json()
+            
+            if failed_ids:
+                logger.warning(f"{target_domain} 同步部分失败，失败数量: {len(failed_ids)}")
+                # 将列表转换为字符串集合
+                return set(str(vid) for vid in failed_ids)
+            
+            logger.info(f"{target_domain} 同步成功，处理 {video_count} 条数据")
+            return set()  # 成功则失败集合为空
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"{target_domain} 同步请求失败: {str(e)}")
+            return video_id_set.copy()  # 请求失败记录所有ID
+        except Exception as e:
+            logger.error(f"{target_domain} 同步异常: {str(e)}")
+            return video_id_set.copy()  # 其他异常记录所有ID
+    
     def clean_to_site(self) -> dict[str, bool]:
         """
         清理站点数据
@@ -256,7 +401,7 @@ class SiteHandler:
                     url=clean_url,
                     json={},
                     timeout=self.request_timeout,
-                    verify=False  # 注意：生产环境建议改为True
+                    verify=self.verify_ssl
                 )
                 
                 if response.status_code == 200:
@@ -9,12 +9,19 @@ Python: 3.11+
 Date: 2025-01-14
 """
 
-import json
+import functools
+import hashlib
 import logging
+import os
+import re
 import shutil
+import time
 from configparser import ConfigParser
 from pathlib import Path
 from typing import Any
+from urllib.parse import urljoin
+
+import orjson
 
 # ============================================================================
 # 常量定义
@@ -29,6 +36,12 @@ logger: logging.Logger = logging.getLogger(__name__)
 # 配置缓存（避免重复加载）
 _config_cache: ConfigParser | None = None
 
+# m3u8中的TS分片行：非注释、以 .ts 结尾或包含 /ts?，捕获去除首尾空白后的内容
+_TS_LINE_RE: re.Pattern[bytes] = re.compile(
+    rb'^[^\S\n]*((?=[^\s#])(?:[^\n]*?\.ts|[^\n]*?/ts\?[^\n]*?))[^\S\n]*$',
+    re.MULTILINE
+)
+
 
 # ============================================================================
 # 配置管理函数
@@ -79,6 +92,7 @@ def load_config(force_reload: bool = False) -> ConfigParser:
     try:
         config.read(config_path, encoding='utf-8')
         _config_cache = config  # 缓存配置
+        _get_state_file_path.cache_clear()  # 状态文件路径依赖配置，随之失效
         logger.info(f"配置文件加载成功: {config_path}")
         return config
     except Exception as e:
@@ -98,6 +112,7 @@ def clear_config_cache() -> None:
     """
     global _config_cache
     _config_cache = None
+    _get_state_file_path.cache_clear()
     logger.debug("配置缓存已清除")
 
 
@@ -105,10 +120,14 @@ def clear_config_cache() -> None:
 # 状态管理函数
 # ============================================================================
 
+@functools.cache
 def _get_state_file_path() -> Path:
     """
     获取状态文件路径（内部函数）
     
+    结果在配置重新加载或清除配置缓存前保持缓存，
+    load_state/save_state 频繁调用时不再重复查询配置。
+    
     Returns:
         Path: 状态文件的完整路径
     """
@@ -117,6 +136,24 @@ def _get_state_file_path() -> Path:
     return BASE_DIR / state_file
 
 
+def _json_default(obj: Any) -> Any:
+    """
+    orjson无法直接序列化的类型转换（内部函数）
+    
+    Args:
+        obj: 待序列化对象
+        
+    Returns:
+        Any: 可序列化的等价对象
+        
+    Raises:
+        TypeError: 不支持的类型
+    """
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
 def load_state() -> dict[str, Any]:
     """
     加载项目状态文件
@@ -135,7 +172,7 @@ def load_state() -> dict[str, Any]:
         }
         
     Raises:
-        json.JSONDecodeError: 当JSON文件格式错误时抛出
+        orjson.JSONDecodeError: 当JSON文件格式错误时抛出（json.JSONDecodeError 的子类）
         IOError: 当文件读取失败时抛出
         
     Example:
@@ -158,11 +195,10 @@ def load_state() -> dict[str, Any]:
         return initial_state
     
     try:
-        with open(state_file_path, mode='r', encoding='utf-8') as f:
-            state_data: dict[str, Any] = json.load(f)
-            logger.debug(f"状态文件加载成功: {state_file_path}")
-            return state_data
-    except json.JSONDecodeError as e:
+        state_data: dict[str, Any] = orjson.loads(state_file_path.read_bytes())
+        logger.debug(f"状态文件加载成功: {state_file_path}")
+        return state_data
+    except orjson.JSONDecodeError as e:
         logger.error(f"状态文件JSON格式错误: {e}")
         raise
     except Exception as e:
@@ -174,13 +210,14 @@ def save_state(data: dict[str, Any]) -> None:
     """
     保存项目状态到文件
     
-    将状态数据序列化为JSON并保存到 state.json 文件。
+    将状态数据序列化为JSON，先写入临时文件再原子替换 state.json，
+    写入过程中进程崩溃也不会损坏已有的状态文件。
     
     Args:
-        data: 需要保存的状态数据字典
+        data: 需要保存的状态数据字典（集合会被转换为排序后的列表）
         
     Raises:
-        json.JSONEncodeError: 当数据无法序列化为JSON时抛出
+        orjson.JSONEncodeError: 当数据无法序列化为JSON时抛出
         IOError: 当文件写入失败时抛出
         
     Example:
@@ -189,28 +226,193 @@ def save_state(data: dict[str, Any]) -> None:
         >>> save_state(data=state)
     
     Note:
-        保存时会格式化JSON输出，缩进为4个空格
+        保存时会格式化JSON输出，缩进为2个空格，非ASCII字符原样以UTF-8写入
     """
     state_file_path: Path = _get_state_file_path()
+    tmp_file_path: Path = state_file_path.with_name(f"{state_file_path.name}.tmp")
     
     try:
-        with open(state_file_path, mode='w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-            logger.debug(f"状态已保存: {state_file_path}")
+        tmp_file_path.write_bytes(orjson.dumps(
+            data,
+            default=_json_default,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        ))
+        os.replace(tmp_file_path, state_file_path)
+        logger.debug(f"状态已保存: {state_file_path}")
     except Exception as e:
         logger.error(f"状态文件保存失败: {e}")
         raise
 
 
+class StateFlusher:
+    """
+    状态保存节流器
+    
+    高频调用 save() 时只记录最新的状态对象，距上次写入超过 flush_interval 秒
+    或累计 flush_every 次保存请求时才真正调用 save_state 写入文件；
+    force_flush() 立即写入尚未落盘的状态。写入仍由 save_state 原子完成。
+    
+    Attributes:
+        flush_interval: 两次写入之间的最短间隔（秒）
+        flush_every: 累计多少次保存请求后必定写入
+        _data: 最近一次请求保存的状态对象
+        _pending: 自上次写入以来的保存请求次数
+        _last_flush: 上次写入的单调时钟时间
+    
+    Example:
+        >>> flusher = StateFlusher(flush_interval=30, flush_every=10)
+        >>> flusher.save(data=state)      # 可能只记录，不写文件
+        >>> flusher.force_flush()         # 退出前确保写入
+    """
+    
+    def __init__(self, flush_interval: float = 30.0, flush_every: int = 10) -> None:
+        """
+        初始化状态保存节流器
+        
+        Args:
+            flush_interval: 两次写入之间的最短间隔（秒）
+            flush_every: 累计多少次保存请求后必定写入
+        """
+        self.flush_interval: float = flush_interval
+        self.flush_every: int = max(1, flush_every)
+        self._data: dict[str, Any] | None = None
+        self._pending: int = 0
+        self._last_flush: float = time.monotonic()
+    
+    def save(self, data: dict[str, Any], force: bool = False) -> None:
+        """
+        请求保存状态，满足节流条件时写入文件
+        
+        Args:
+            data: 需要保存的状态数据字典
+            force: 为True时立即写入
+        """
+        self._data = data
+        self._pending += 1
+        
+        if (
+            force
+            or self._pending >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.force_flush()
+    
+    def force_flush(self) -> None:
+        """
+        立即写入尚未落盘的状态，没有待写入的状态时不做任何操作
+        """
+        if self._data is None or not self._pending:
+            return
+        
+        save_state(data=self._data)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+
+# ============================================================================
+# 加密工具函数
+# ============================================================================
+
+@functools.lru_cache(maxsize=8)
+def derive_aes_key_iv(encryption_key: str) -> tuple[bytes, bytes]:
+    """
+    由加密密钥字符串派生AES密钥和初始化向量
+    
+    派生规则：密钥为 SHA256(key)，IV 为 MD5(key) 的前16字节。
+    结果按密钥字符串缓存，OSS/S3处理器及多个实例共享同一份派生结果。
+    
+    Args:
+        encryption_key: 配置中的加密密钥字符串
+        
+    Returns:
+        tuple[bytes, bytes]: (32字节AES密钥, 16字节IV)
+        
+    Example:
+        >>> aes_key, aes_iv = derive_aes_key_iv(encryption_key='default_key_12345')
+        >>> len(aes_key), len(aes_iv)
+        (32, 16)
+    """
+    key_bytes: bytes = encryption_key.encode('utf-8')
+    return hashlib.sha256(key_bytes).digest(), hashlib.md5(key_bytes).digest()[:16]
+
+
+# ============================================================================
+# m3u8工具函数
+# ============================================================================
+
+def keep_remote_ts_paths(m3u8_content: bytes, base_url: str) -> bytes:
+    """
+    保持TS分片的远程路径，转换为绝对URL
+    
+    OSS/S3处理器共用，保证两者的m3u8改写规则一致。
+    
+    Args:
+        m3u8_content: m3u8文件原始字节内容
+        base_url: 原始m3u8链接
+        
+    Returns:
+        bytes: 修改后的m3u8内容，可直接作为上传body
+    """
+    # 同一m3u8的所有分片共享基准路径，只解析一次
+    base_dir: str = urljoin(base=base_url, url='_')[:-1]
+    base_root: str = urljoin(base=base_url, url='/_')[:-1]
+    
+    def _resolve(ts_path: str) -> str:
+        path: str = ts_path.split('?', 1)[0]
+        # 点段、空段、scheme、fragment等需要规范化的形式交给urljoin
+        if not path or path[0] == '.' or ts_path[-1] == '?' or '//' in path or '/.' in path \
+           or any(char in ts_path for char in ':#\t\r'):
+            return urljoin(base=base_url, url=ts_path)
+        if path[0] == '/':
+            return base_root + ts_path[1:]
+        return base_dir + ts_path
+    
+    def _to_absolute(match: re.Match[bytes]) -> bytes:
+        ts_path: bytes = match.group(1)
+        if ts_path.startswith(b'http'):
+            return ts_path
+        absolute_url: str = _resolve(ts_path=ts_path.decode('utf-8', 'surrogateescape'))
+        return absolute_url.encode('utf-8', 'surrogateescape')
+    
+    # 单次正则替换，仅改写TS分片行，其余行原样保留
+    return _TS_LINE_RE.sub(_to_absolute, m3u8_content)
+
+
 # ============================================================================
 # 系统检查函数
 # ============================================================================
 
+@functools.cache
+def _find_ffmpeg() -> str | None:
+    """
+    查找 ffmpeg 可执行文件路径（内部函数）
+    
+    结果在进程内缓存，避免每次检查都遍历PATH中的所有目录；
+    PATH变化或安装FFmpeg后需调用 invalidate_ffmpeg_cache() 重新查找。
+    
+    Returns:
+        str | None: ffmpeg 的完整路径，未找到时返回None
+    """
+    return shutil.which('ffmpeg')
+
+
+def invalidate_ffmpeg_cache() -> None:
+    """
+    清除 ffmpeg 查找结果缓存
+    
+    Example:
+        >>> invalidate_ffmpeg_cache()
+        >>> is_ffmpeg_installed()  # 将重新查找PATH
+    """
+    _find_ffmpeg.cache_clear()
+    logger.debug("FFmpeg 查找缓存已清除")
+
+
 def is_ffmpeg_installed() -> bool:
     """
     检查系统是否安装了FFmpeg
     
-    通过检查PATH环境变量中是否存在 ffmpeg 可执行文件来判断。
+    通过检查PATH环境变量中是否存在 ffmpeg 可执行文件来判断，查找结果在进程内缓存。
     
     Returns:
         bool: 已安装返回True，否则返回False
@@ -224,7 +426,7 @@ def is_ffmpeg_installed() -> bool:
     Note:
         该函数仅检查 ffmpeg 是否在PATH中，不验证版本或功能
     """
-    is_installed: bool = shutil.which('ffmpeg') is not None
+    is_installed: bool = _find_ffmpeg() is not None
     
     if is_installed:
         logger.debug("FFmpeg 已安装")
@@ -12,24 +12,34 @@ Date: 2025-01-14
 import argparse
 import atexit
 import logging
+import operator
 import signal
 import sys
-import time
-from typing import Any
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any
 import urllib3
 
 from core import (
-    ApiHandler,
-    DatabaseHandler,
-    OSSHandler,
-    S3Handler,
-    SiteHandler,
+    StateFlusher,
+    clear_handlers,
+    get_api_handler,
+    get_database_handler,
+    get_oss_handler,
+    get_s3_handler,
+    get_site_handler,
     load_config,
     load_state,
+    replay_failed_ids,
     save_state,
     setup_logger,
 )
 
+# 处理器类仅用于类型注解；实际模块由 get_*_handler 在命令需要时才导入
+if TYPE_CHECKING:
+    from core import ApiHandler, DatabaseHandler, OSSHandler, SiteHandler
+
 # ============================================================================
 # 全局配置
 # ============================================================================
@@ -94,6 +104,9 @@ def cleanup_resources() -> None:
             except Exception as e:
                 logger.error(f"释放资源失败 ({name}): {e}")
     
+    # 已关闭的处理器不再复用
+    clear_handlers()
+    
     logger.info("资源清理完成")
 
 
@@ -118,6 +131,86 @@ def check_exit_flag() -> bool:
     return _EXIT_FLAG
 
 
+# ============================================================================
+# 抓取辅助函数
+# ============================================================================
+
+# 合并到视频数据中的详情字段及缺省值（缺失字段先由缺省值补齐，再一次性取出；缺省值为共享对象，须不可变）
+_DETAIL_DEFAULTS: dict[str, Any] = {
+    'video_list': (),
+    'download_url': '',
+    'cover': '',
+    'desc': '',
+    'c_desc': '',
+    'free_watch_episodes': 0,
+}
+_get_detail_fields: operator.itemgetter = operator.itemgetter(*_DETAIL_DEFAULTS)
+
+
+def _fetch_video_details(api: 'ApiHandler', douban_id: str, title: str) -> dict[str, Any] | None:
+    """
+    获取单个视频的详情（供线程池并发调用）
+    
+    Args:
+        api: API处理器（线程安全，共享会话与Token）
+        douban_id: 豆瓣ID
+        title: 视频标题，用于日志
+        
+    Returns:
+        dict[str, Any] | None: 视频详情，获取失败或详情为空时返回None
+    """
+    logger.info(f"获取视频详情: '{title}' (ID: {douban_id})")
+    
+    detail_response: dict[str, Any] | None = api.fetch_video_details(douban_id=douban_id)
+    if not detail_response or detail_response.get('code') != 0:
+        logger.warning(f"获取视频详情失败: {douban_id}")
+        return None
+    
+    details: dict[str, Any] | None = detail_response.get('data')
+    if not details:
+        logger.warning(f"视频详情为空，跳过: {douban_id}")
+        return None
+    
+    return details
+
+
+def _sync_video_to_oss(
+    oss_handler: 'OSSHandler',
+    douban_id: str,
+    title: str,
+    video_list: list[str],
+    cover: str
+) -> bool:
+    """
+    上传单个视频的所有剧集和封面到OSS（供线程池并发调用）
+    
+    Args:
+        oss_handler: OSS处理器
+        douban_id: 豆瓣ID（run_scraper入口处已规范化的十进制字符串）
+        title: 视频标题
+        video_list: m3u8链接列表
+        cover: 封面图片链接
+        
+    Returns:
+        bool: 上传成功返回True，失败返回False
+    """
+    try:
+        logger.info(f"开始上传到OSS: '{title}' (ID: {douban_id})")
+        result: bool = oss_handler.process_single_video_sync(
+            douban_id=douban_id,
+            title=title,
+            video_list=video_list,
+            cover=cover
+        )
+        
+        if not result:
+            logger.error(f"OSS同步失败: {douban_id}")
+        return result
+    except Exception as e:
+        logger.error(f"OSS同步异常: {douban_id}, 错误: {e}")
+        return False
+
+
 # ============================================================================
 # 核心业务函数
 # ============================================================================
@@ -151,11 +244,19 @@ def run_scraper(config: Any) -> None:
     # 加载状态
     state: dict[str, Any] = load_state()
     current_page: int = state.get('api', {}).get('last_page', 0)
-    failed_synced_ids: list[str] = state.get('oss', {}).get('failed_synced_ids', [])
+    # 失败ID以集合累计（统一为字符串），同一ID跨多次运行不会重复堆积；保存时再转为列表
+    failed_synced_ids: set[str] = {str(douban_id) for douban_id in state.get('oss', {}).get('failed_synced_ids', [])}
     failed_site_raw: dict[str, list] = state.get('site', {}).get('failed_domain_ids', {})
-    # 将list转换为set，方便后续操作
-    failed_site: dict[str, set[str]] = {k: set(v) for k, v in failed_site_raw.items()}
-    failed_detail_ids: list[str] = state.get('api', {}).get('failed_detail_ids', [])
+    # 将list转换为set，方便后续操作；新出现的域名自动创建空集合
+    failed_site: defaultdict[str, set[str]] = defaultdict(set, {k: set(v) for k, v in failed_site_raw.items()})
+    failed_detail_ids: set[str] = {str(douban_id) for douban_id in state.get('api', {}).get('failed_detail_ids', [])}
+    
+    # 每页的进度保存经节流后写入，进程退出时确保最后一次进度落盘
+    state_flusher: StateFlusher = StateFlusher(
+        flush_interval=config.getfloat('project_state', 'flush_interval', fallback=30.0),
+        flush_every=config.getint('project_state', 'flush_every', fallback=10)
+    )
+    atexit.register(state_flusher.force_flush)
     
     # 从头开始时重置页码
     if current_page == 0:
@@ -166,10 +267,16 @@ def run_scraper(config: Any) -> None:
         logger.info(f"从第{current_page}页继续抓取")
     
     # 初始化处理器
-    api: ApiHandler = ApiHandler(config=config)
-    db: DatabaseHandler = DatabaseHandler(config=config)
-    oss_handler: OSSHandler = OSSHandler(config=config)
-    site_handler: SiteHandler = SiteHandler(config=config)
+    api: ApiHandler = get_api_handler(config=config)
+    db: DatabaseHandler = get_database_handler(config=config)
+    oss_handler: OSSHandler = get_oss_handler(config=config)
+    site_handler: SiteHandler = get_site_handler(config=config)
+    
+    # 每页视频详情获取与OSS上传的并发数（不超过API连接池大小，保证详情请求都能复用连接）
+    fetch_concurrency: int = max(1, min(
+        config.getint('api', 'fetch_concurrency', fallback=8),
+        api.pool_maxsize
+    ))
     
     # 注册资源用于清理
     register_resource('api', api)
@@ -207,7 +314,7 @@ def run_scraper(config: Any) -> None:
                 
                 if new_token:
                     state['api']['token'] = new_token
-                    save_state(data=state)
+                    state_flusher.save(data=state)
                     logger.info("重新登录成功，将重试请求当前页面")
                     continue  # 重试当前页
                 else:
@@ -227,89 +334,103 @@ def run_scraper(config: Any) -> None:
                 # 当前页成功处理的视频ID集合
                 processed_ids: set[str] = set()
                 
-                # 处理每个视频
+                # 本页视频ID列（与 page_videos 按位置对应）：入口处校验并规范化为十进制字符串一次，
+                # 并写回视频数据，使查重、数据库记录、插入结果与OSS对象键使用同一个值；
+                # 无法解析的ID生成不了存储路径，直接跳过
+                page_ids: list[str] = []
+                page_videos: list[dict[str, Any]] = []
                 for video in videos:
-                    # 检查退出标志
-                    if check_exit_flag():
-                        logger.warning("检测到退出信号，保存进度并退出...")
-                        break
-                    
-                    douban_id: str = video.get('id', '')
-                    title: str = video.get('title', '')
-                    
-                    # 检查是否已存在
-                    if db.video_exists(douban_id=douban_id):
-                        logger.info(f"视频已存在，跳过: '{title}' (ID: {douban_id})")
+                    try:
+                        douban_id: str = str(int(video.get('id', '')))
+                    except (TypeError, ValueError):
+                        logger.warning(f"视频ID无效，跳过: '{video.get('title', '')}' (ID: {video.get('id')!r})")
                         continue
+                    video['id'] = douban_id
+                    page_ids.append(douban_id)
+                    page_videos.append(video)
+                
+                # 一次查询当前页所有已存在的视频
+                existing_ids: set[str] = db.videos_exist(douban_ids=page_ids)
+                
+                # 已存在的视频直接跳过，其余视频的详情并发获取
+                pending_videos: list[tuple[str, dict[str, Any]]] = []
+                for douban_id, video in zip(page_ids, page_videos):
+                    if douban_id in existing_ids:
+                        logger.info(f"视频已存在，跳过: '{video.get('title', '')}' (ID: {douban_id})")
+                    else:
+                        pending_videos.append((douban_id, video))
+                
+                # 详情获取与OSS上传在线程池中并发执行；数据库读写只在主线程进行，
+                # 本页全部详情获取完成后一次批量插入，再提交插入成功视频的OSS上传与站点同步
+                with (
+                    ThreadPoolExecutor(max_workers=fetch_concurrency) as executor,
+                    ThreadPoolExecutor(max_workers=1) as site_executor
+                ):
+                    detail_futures: list[tuple[str, dict[str, Any], Future[dict[str, Any] | None]]] = [
+                        (
+                            douban_id,
+                            video,
+                            executor.submit(_fetch_video_details, api, douban_id, video.get('title', ''))
+                        )
+                        for douban_id, video in pending_videos
+                    ]
+                    to_insert_ids: list[str] = []
+                    to_insert: list[dict[str, Any]] = []
                     
-                    # 获取视频详情
-                    logger.info(f"获取视频详情: '{title}' (ID: {douban_id})")
-                    detail_response: dict[str, Any] | None = api.fetch_video_details(
-                        douban_id=douban_id
-                    )
-                    
-                    if detail_response and detail_response.get('code') == 0:
-                        details: dict[str, Any] | None = detail_response.get('data')
+                    for douban_id, video, detail_future in detail_futures:
+                        # 检查退出标志
+                        if check_exit_flag():
+                            logger.warning("检测到退出信号，保存进度并退出...")
+                            for _, _, pending in detail_futures:
+                                pending.cancel()
+                            break
                         
-                        if not details:
-                            logger.warning(f"视频详情为空，跳过: {douban_id}")
-                            failed_detail_ids.append(douban_id)
+                        details: dict[str, Any] | None = detail_future.result()
+                        if details is None:
+                            failed_detail_ids.add(douban_id)
                             continue
                         
-                        # 更新视频数据
-                        video_list: list[str] = details.get('video_list', [])
-                        download_url: str = details.get('download_url', '')
-                        cover: str = details.get('cover', '')
-                        desc: str = details.get('desc', '') or details.get('c_desc', '')
-                        free_watch_episodes: int = details.get('free_watch_episodes', 0)
-                        
-                        video.update({
-                            'title': title,
-                            'video_list': video_list,
-                            'download_url': download_url,
-                            'cover': cover,
-                            'desc': desc,
-                            'free_watch_episodes': free_watch_episodes
-                        })
-                    else:
-                        logger.warning(f"获取视频详情失败: {douban_id}")
-                        failed_detail_ids.append(douban_id)
-                        continue
-                    
-                    # 插入数据库
-                    if not db.insert_video(video_data=video):
-                        logger.error(f"数据库插入失败: {douban_id}")
-                        continue
-                    
-                    processed_ids.add(douban_id)
-                    
-                    # 上传到OSS
-                    try:
-                        logger.info(f"开始上传到OSS: '{title}' (ID: {douban_id})")
-                        result: bool = oss_handler.process_single_video_sync(
-                            douban_id=int(douban_id),
-                            title=title,
+                        # 合并详情字段（列表接口已有的字段保持原值）
+                        video_list, download_url, cover, desc, c_desc, free_watch_episodes = _get_detail_fields(
+                            _DETAIL_DEFAULTS | details
+                        )
+                        video.update(
                             video_list=video_list,
-                            cover=cover
+                            download_url=download_url,
+                            cover=cover,
+                            desc=desc or c_desc,
+                            free_watch_episodes=free_watch_episodes
                         )
+                        to_insert_ids.append(douban_id)
+                        to_insert.append(video)
+                    
+                    # 收到退出信号时本页不再写入，下次运行从本页重新抓取
+                    upload_futures: dict[Future[bool], str] = {}
+                    if not check_exit_flag():
+                        # 插入数据库（整页一次批量写入）
+                        inserted_ids: set[str] = set(db.insert_videos(videos=to_insert))
                         
-                        if not result:
-                            logger.error(f"OSS同步失败: {douban_id}")
-                            failed_synced_ids.append(douban_id)
-                    except Exception as e:
-                        logger.error(f"OSS同步异常: {douban_id}, 错误: {e}")
-                        failed_synced_ids.append(douban_id)
+                        for douban_id, video in zip(to_insert_ids, to_insert):
+                            if douban_id not in inserted_ids:
+                                logger.error(f"数据库插入失败: {douban_id}")
+                                continue
+                            
+                            processed_ids.add(douban_id)
+                            
+                            # 上传到OSS
+                            upload_futures[executor.submit(
+                                _sync_video_to_oss,
+                                oss_handler,
+                                douban_id,
+                                video.get('title', ''),
+                                video['video_list'],
+                                video['cover']
+                            )] = douban_id
                     
-                    # 避免请求过快
-                    time.sleep(0.5)
-                
-                # 检查是否因退出信号中断循环
-                if check_exit_flag():
-                    break
-                
-                # 同步到站点
-                if processed_ids:
-                    try:
+                    # 站点数据取自数据库，不依赖OSS上传结果：在主线程查询后交给站点线程发送
+                    # （由SiteHandler按批分发到各域名），与OSS上传相互重叠
+                    site_future: Future[dict[str, set[str]]] | None = None
+                    if processed_ids and not check_exit_flag():
                         logger.info(f"开始同步 {len(processed_ids)} 个视频到站点")
                         
                         # 从数据库查询视频数据
@@ -318,46 +439,47 @@ def run_scraper(config: Any) -> None:
                         )
                         
                         if not site_videos:
-                            raise Exception("从数据库查询视频数据为空")
-                        
-                        # 同步到站点
-                        sync_failed_ids: dict[str, set[str]] = site_handler.sync_videos_to_site(
-                            videos=site_videos
-                        )
-                        
-                        # 更新失败记录
-                        if sync_failed_ids:
-                            for domain, domain_failed_ids in sync_failed_ids.items():
-                                if domain in failed_site:
-                                    failed_site[domain] |= domain_failed_ids
-                                else:
-                                    failed_site[domain] = domain_failed_ids
-                                    
-                    except Exception as e:
-                        logger.error(f"站点同步失败: {e}")
-                        
-                        # 记录所有视频到所有域名的失败列表
-                        domains_str: str = config.get('site', 'domains', fallback='')
-                        domains: list[str] = [
-                            d.strip() for d in domains_str.split(',') if d.strip()
-                        ]
+                            logger.error("站点同步失败: 从数据库查询视频数据为空")
+                            for domain in site_handler.domains:
+                                failed_site[domain].update(processed_ids)
+                        else:
+                            site_future = site_executor.submit(
+                                site_handler.sync_videos_to_site,
+                                videos=site_videos
+                            )
+                    elif not processed_ids:
+                        logger.info("本页没有需要同步到站点的新视频")
+                    
+                    # 等待本页已提交的OSS上传全部完成
+                    for upload_future in as_completed(upload_futures):
+                        if not upload_future.result():
+                            failed_synced_ids.add(upload_futures[upload_future])
+                    
+                    # 汇总站点同步的失败记录
+                    if site_future is not None:
+                        try:
+                            sync_failed_ids: dict[str, set[str]] = site_future.result()
+                        except Exception as e:
+                            logger.error(f"站点同步失败: {e}")
+                            # 记录所有视频到所有域名的失败列表（域名列表由SiteHandler初始化时解析一次）
+                            sync_failed_ids = dict.fromkeys(site_handler.domains, processed_ids)
                         
-                        for domain in domains:
-                            failed_site.setdefault(domain, set()).update(processed_ids)
-                    finally:
-                        site_handler.close()
-                else:
-                    logger.info("本页没有需要同步到站点的新视频")
+                        for domain, domain_failed_ids in sync_failed_ids.items():
+                            failed_site[domain].update(domain_failed_ids)
+                
+                # 检查是否因退出信号中断循环
+                if check_exit_flag():
+                    break
                 
-                # 保存状态
+                # 保存状态（Token可能已被自动刷新；集合由save_state在实际写入时转为列表）
                 state['api']['last_page'] = current_page
-                state['oss']['failed_synced_ids'] = failed_synced_ids
-                state['site']['failed_domain_ids'] = {k: list(v) for k, v in failed_site.items()}
-                save_state(data=state)
+                state['api']['token'] = api.token
+                state['oss']['failed_synced_ids'] = list(failed_synced_ids)
+                state['site']['failed_domain_ids'] = failed_site
+                state_flusher.save(data=state)
                 
-                # 处理下一页
+                # 处理下一页（请求速率由ApiHandler的令牌桶控制）
                 current_page += 1
-                time.sleep(1)
                 
             else:
                 # 其他API错误
@@ -368,19 +490,22 @@ def run_scraper(config: Any) -> None:
         logger.warning("用户中断操作 (Ctrl+C)，保存当前进度...")
         # 保存当前状态
         state['api']['last_page'] = current_page
-        state['api']['failed_detail_ids'] = failed_detail_ids
-        state['oss']['failed_synced_ids'] = failed_synced_ids
-        state['site']['failed_domain_ids'] = {k: list(v) for k, v in failed_site.items()}
-        save_state(data=state)
+        state['api']['failed_detail_ids'] = list(failed_detail_ids)
+        state['oss']['failed_synced_ids'] = list(failed_synced_ids)
+        state['site']['failed_domain_ids'] = failed_site
+        state_flusher.save(data=state, force=True)
     except Exception as e:
         logger.error(f"脚本执行异常: {e}", exc_info=True)
         # 保存当前状态
         state['api']['last_page'] = current_page
-        state['api']['failed_detail_ids'] = failed_detail_ids
-        state['oss']['failed_synced_ids'] = failed_synced_ids
-        state['site']['failed_domain_ids'] = {k: list(v) for k, v in failed_site.items()}
-        save_state(data=state)
+        state['api']['failed_detail_ids'] = list(failed_detail_ids)
+        state['oss']['failed_synced_ids'] = list(failed_synced_ids)
+        state['site']['failed_domain_ids'] = failed_site
+        state_flusher.save(data=state, force=True)
     finally:
+        # 写入节流期间尚未落盘的进度
+        state_flusher.force_flush()
+        atexit.unregister(state_flusher.force_flush)
         logger.info("=" * 80)
         logger.info("API数据抓取脚本执行结束")
         logger.info("=" * 80)
@@ -400,121 +525,14 @@ def run_oss_fixer(config: Any) -> None:
         >>> config = load_config()
         >>> run_oss_fixer(config=config)
     """
-    logger.info("=" * 80)
-    logger.info("启动OSS数据修复脚本")
-    logger.info("=" * 80)
-    
-    state: dict[str, Any] = load_state()
-    fix_ids: list[str] = state.get('oss', {}).get('failed_synced_ids', [])
-    
-    if not fix_ids:
-        logger.info("没有需要修复的OSS记录")
-        return
-    
-    logger.info(f"需要修复的记录数: {len(fix_ids)}")
-    
-    # 初始化处理器
-    api: ApiHandler = ApiHandler(config=config)
-    oss_handler: OSSHandler = OSSHandler(config=config)
-    
-    # 注册资源用于清理
-    register_resource('api', api)
-    register_resource('oss_handler', oss_handler)
-    
-    # 设置Token
-    token: str | None = state.get('api', {}).get('token', '')
-    if token:
-        api.set_token(token=token)
-    
-    failed_synced_ids: list[int] = []
-    
-    try:
-        for douban_id in fix_ids:
-            logger.info(f"开始修复: {douban_id}")
-            
-            # 最多重试2次
-            max_retries: int = 2
-            for attempt in range(max_retries):
-                # 获取视频详情
-                response_data: dict[str, Any] | None = api.fetch_video_details(
-                    douban_id=str(douban_id)
-                )
-                
-                if response_data is None:
-                    logger.error(f"获取详情失败 (douban_id: {douban_id})")
-                    break
-                
-                response_code: int = response_data.get('code', -1)
-                
-                if response_code == 0:
-                    details: dict[str, Any] | None = response_data.get('data')
-                    
-                    if not details:
-                        logger.warning(f"视频详情为空，跳过: {douban_id}")
-                        break
-                    
-                    # 提取数据
-                    video_list: list[str] = details.get('video_list', [])
-                    cover: str = details.get('cover', '')
-                    title: str = details.get('title', '')
-                    
-                    # 上传到OSS
-                    try:
-                        result: bool = oss_handler.process_single_video_sync(
-                            douban_id=douban_id,
-                            title=title,
-                            video_list=video_list,
-                            cover=cover
-                        )
-                        
-                        if result:
-                            logger.info(f"修复成功: {douban_id}")
-                            break
-                        else:
-                            raise Exception("OSS同步失败")
-                            
-                    except Exception as e:
-                        logger.error(f"OSS同步异常: {e}")
-                        failed_synced_ids.append(douban_id)
-                        break
-                
-                elif response_code == 402:
-                    # Token过期，重新登录
-                    logger.warning(f"Token已过期，尝试重新登录 (第 {attempt + 1} 次)")
-                    new_token: str | None = api.login()
-                    
-                    if new_token:
-                        state['api']['token'] = new_token
-                        save_state(data=state)
-                        continue
-                    else:
-                        logger.error("重新登录失败")
-                        failed_synced_ids.append(douban_id)
-                        break
-                else:
-                    logger.error(f"未知API错误 (Code: {response_code})")
-                    failed_synced_ids.append(douban_id)
-                    break
-            
-            # 避免请求过快
-            time.sleep(1)
-        
-        # 更新状态
-        state['oss']['failed_synced_ids'] = failed_synced_ids
-        save_state(data=state)
-        
-    except KeyboardInterrupt:
-        logger.warning("用户中断操作 (Ctrl+C)，保存当前进度...")
-        state['oss']['failed_synced_ids'] = failed_synced_ids
-        save_state(data=state)
-    except Exception as e:
-        logger.error(f"脚本执行异常: {e}", exc_info=True)
-        state['oss']['failed_synced_ids'] = failed_synced_ids
-        save_state(data=state)
-    finally:
-        logger.info("=" * 80)
-        logger.info("OSS数据修复脚本执行结束")
-        logger.info("=" * 80)
+    replay_failed_ids(
+        config=config,
+        handler_factory=get_oss_handler,
+        state_key='oss',
+        label='OSS',
+        should_stop=check_exit_flag,
+        register=register_resource
+    )
 
 
 def run_s3_fixer(config: Any) -> None:
@@ -531,126 +549,14 @@ def run_s3_fixer(config: Any) -> None:
         >>> config = load_config()
         >>> run_s3_fixer(config=config)
     """
-    logger.info("=" * 80)
-    logger.info("启动S3数据修复脚本")
-    logger.info("=" * 80)
-    
-    state: dict[str, Any] = load_state()
-    fix_ids: list[int] = state.get('s3', {}).get('failed_synced_ids', [])
-    
-    if not fix_ids:
-        logger.info("没有需要修复的S3记录")
-        return
-    
-    logger.info(f"需要修复的记录数: {len(fix_ids)}")
-    
-    # 初始化处理器
-    api: ApiHandler = ApiHandler(config=config)
-    s3_handler: S3Handler = S3Handler(config=config)
-    
-    # 注册资源用于清理
-    register_resource('api', api)
-    register_resource('s3_handler', s3_handler)
-    
-    # 设置Token
-    token: str | None = state.get('api', {}).get('token', '')
-    if token:
-        api.set_token(token=token)
-    
-    failed_synced_ids: list[int] = []
-    
-    try:
-        for douban_id in fix_ids:
-            # 检查退出标志
-            if check_exit_flag():
-                logger.warning("检测到退出信号，保存进度并退出...")
-                break
-            
-            logger.info(f"开始修复: {douban_id}")
-            
-            # 最多重试2次
-            max_retries: int = 2
-            for attempt in range(max_retries):
-                # 获取视频详情
-                response_data: dict[str, Any] | None = api.fetch_video_details(
-                    douban_id=str(douban_id)
-                )
-                
-                if response_data is None:
-                    logger.error(f"获取详情失败 (douban_id: {douban_id})")
-                    break
-                
-                response_code: int = response_data.get('code', -1)
-                
-                if response_code == 0:
-                    details: dict[str, Any] | None = response_data.get('data')
-                    
-                    if not details:
-                        logger.warning(f"视频详情为空，跳过: {douban_id}")
-                        break
-                    
-                    # 提取数据
-                    video_list: list[str] = details.get('video_list', [])
-                    cover: str = details.get('cover', '')
-                    title: str = details.get('title', '')
-                    
-                    # 上传到S3
-                    try:
-                        result: bool = s3_handler.process_single_video_sync(
-                            douban_id=douban_id,
-                            title=title,
-                            video_list=video_list,
-                            cover=cover
-                        )
-                        
-                        if result:
-                            logger.info(f"修复成功: {douban_id}")
-                            break
-                        else:
-                            raise Exception("S3同步失败")
-                            
-                    except Exception as e:
-                        logger.error(f"S3同步异常: {e}")
-                        failed_synced_ids.append(douban_id)
-                        break
-                
-                elif response_code == 402:
-                    # Token过期，重新登录
-                    logger.warning(f"Token已过期，尝试重新登录 (第 {attempt + 1} 次)")
-                    new_token: str | None = api.login()
-                    
-                    if new_token:
-                        state['api']['token'] = new_token
-                        save_state(data=state)
-                        continue
-                    else:
-                        logger.error("重新登录失败")
-                        failed_synced_ids.append(douban_id)
-                        break
-                else:
-                    logger.error(f"未知API错误 (Code: {response_code})")
-                    failed_synced_ids.append(douban_id)
-                    break
-            
-            # 避免请求过快
-            time.sleep(1)
-        
-        # 更新状态
-        state['s3']['failed_synced_ids'] = failed_synced_ids
-        save_state(data=state)
-        
-    except KeyboardInterrupt:
-        logger.warning("用户中断操作 (Ctrl+C)，保存当前进度...")
-        state['s3']['failed_synced_ids'] = failed_synced_ids
-        save_state(data=state)
-    except Exception as e:
-        logger.error(f"脚本执行异常: {e}", exc_info=True)
-        state['s3']['failed_synced_ids'] = failed_synced_ids
-        save_state(data=state)
-    finally:
-        logger.info("=" * 80)
-        logger.info("S3数据修复脚本执行结束")
-        logger.info("=" * 80)
+    replay_failed_ids(
+        config=config,
+        handler_factory=get_s3_handler,
+        state_key='s3',
+        label='S3',
+        should_stop=check_exit_flag,
+        register=register_resource
+    )
 
 
 def run_site_fixer(config: Any) -> None:
@@ -672,69 +578,79 @@ def run_site_fixer(config: Any) -> None:
     logger.info("=" * 80)
     
     state: dict[str, Any] = load_state()
-    db: DatabaseHandler = DatabaseHandler(config=config)
-    site_handler: SiteHandler = SiteHandler(config=config)
+    db: DatabaseHandler = get_database_handler(config=config)
+    site_handler: SiteHandler = get_site_handler(config=config)
     
     # 注册资源用于清理
     register_resource('db', db)
     register_resource('site_handler', site_handler)
     
     fix_sites: dict[str, list[str]] = state.get('site', {}).get('failed_domain_ids', {})
-    failed_site: dict[str, set[str]] = {}
+    failed_site: defaultdict[str, set[str]] = defaultdict(set)
     
     if not fix_sites:
         logger.info("没有需要修复的站点同步记录")
         return
     
+    concurrency: int = config.getint('fixer', 'concurrency', fallback=8)
+    
     try:
-        # 遍历每个域名的失败记录
-        for domain, failed_ids in fix_sites.items():
-            # 检查退出标志
-            if check_exit_flag():
-                logger.warning("检测到退出信号，保存进度并退出...")
-                break
-            
-            if not failed_ids:
-                continue
-            
-            logger.info(f"开始修复域名 {domain} 的 {len(failed_ids)} 个失败记录")
-            
-            # 从数据库查询视频数据
-            site_videos: list[dict[str, Any]] = db.get_videos_by_ids(
-                douban_ids=list(failed_ids)
-            )
-            
-            if not site_videos:
-                logger.warning(f"域名 {domain} 从数据库查询视频数据为空")
-                failed_site[domain] = set(failed_ids)
-                continue
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures: dict[Future[dict[str, set[str]]], str] = {}
             
-            # 重新同步到站点
-            try:
-                failed_site_ids: dict[str, set[str]] = site_handler.sync_videos_to_site(
+            # 数据库查询在主线程中逐个域名进行，站点同步请求并发发送
+            for domain, failed_ids in fix_sites.items():
+                # 检查退出标志
+                if check_exit_flag():
+                    logger.warning("检测到退出信号，保存进度并退出...")
+                    break
+                
+                if not failed_ids:
+                    continue
+                
+                logger.info(f"开始修复域名 {domain} 的 {len(failed_ids)} 个失败记录")
+                
+                # 从数据库查询视频数据
+                site_videos: list[dict[str, Any]] = db.get_videos_by_ids(
+                    douban_ids=list(failed_ids)
+                )
+                
+                if not site_videos:
+                    logger.warning(f"域名 {domain} 从数据库查询视频数据为空")
+                    failed_site[domain].update(failed_ids)
+                    continue
+                
+                # 重新同步到站点
+                futures[executor.submit(
+                    site_handler.sync_videos_to_site,
                     videos=site_videos,
                     domain=domain
-                )
+                )] = domain
+            
+            for future in as_completed(futures):
+                domain = futures[future]
+                try:
+                    failed_site_ids: dict[str, set[str]] = future.result()
+                    
+                    if failed_site_ids:
+                        for d, fids in failed_site_ids.items():
+                            failed_site[d].update(fids)
                 
-                if failed_site_ids:
-                    for d, fids in failed_site_ids.items():
-                        failed_site[d] = fids
-                        
-            except Exception as e:
-                logger.error(f"站点修复失败: {e}")
-                failed_site[domain] = set(failed_ids)
+                except Exception as e:
+                    logger.error(f"站点修复失败: {e}")
+                    failed_site[domain].update(fix_sites[domain])
         
         # 更新状态
-        state['site']['failed_domain_ids'] = {k: list(v) for k, v in failed_site.items()}
+        state['site']['failed_domain_ids'] = failed_site
         save_state(data=state)
         
     except KeyboardInterrupt:
         logger.warning("用户中断操作 (Ctrl+C)，保存当前进度...")
-        state['site']['failed_domain_ids'] = {k: list(v) for k, v in failed_site.items()}
+        state['site']['failed_domain_ids'] = failed_site
         save_state(data=state)
     except Exception as e:
         logger.error(f"脚本执行异常: {e}", exc_info=True)
-        state['site']['failed_domain_ids'] = {k: list(v) for k, v in failed_site.items()}
+        state['site']['failed_domain_ids'] = failed_site
         save_state(data=state)
     finally:
         logger.info("=" * 80)
@@ -760,7 +676,7 @@ def run_site_clean(config: Any) -> None:
     logger.info("启动站点数据清理脚本")
     logger.info("=" * 80)
     
-    site_handler: SiteHandler = SiteHandler(config=config)
+    site_handler: SiteHandler = get_site_handler(config=config)
     
     # 注册资源用于清理
     register_resource('site_handler', site_handler)
@@ -787,6 +703,20 @@ def run_site_clean(config: Any) -> None:
 # 命令行入口
 # ============================================================================
 
+# ============================================================================
+# 命令分发表
+# ============================================================================
+
+# 命令名 -> (处理函数, 帮助信息)
+COMMANDS: dict[str, tuple[Callable[..., None], str]] = {
+    'scraper': (run_scraper, '抓取API元数据并存入数据库'),
+    'oss_fix': (run_oss_fixer, '修复OSS上传失败的数据'),
+    's3_fix': (run_s3_fixer, '修复S3上传失败的数据'),
+    'site_fix': (run_site_fixer, '修复站点同步失败的数据'),
+    'site_clean': (run_site_clean, '清理站点数据'),
+}
+
+
 def main() -> None:
     """
     程序主函数
@@ -826,11 +756,8 @@ def main() -> None:
         )
         
         # 创建子命令
-        subparsers.add_parser('scraper', help='抓取API元数据并存入数据库')
-        subparsers.add_parser('oss_fix', help='修复OSS上传失败的数据')
-        subparsers.add_parser('s3_fix', help='修复S3上传失败的数据')
-        subparsers.add_parser('site_fix', help='修复站点同步失败的数据')
-        subparsers.add_parser('site_clean', help='清理站点数据')
+        for command, (_, help_text) in COMMANDS.items():
+            subparsers.add_parser(command, help=help_text)
         
         # 解析参数
         args: argparse.Namespace = parser.parse_args()
@@ -838,19 +765,9 @@ def main() -> None:
         # 加载配置
         config: Any = load_config()
         
-        # 路由到相应函数
-        if args.command == 'scraper':
-            run_scraper(config=config)
-        elif args.command == 'oss_fix':
-            run_oss_fixer(config=config)
-        elif args.command == 's3_fix':
-            run_s3_fixer(config=config)
-        elif args.command == 'site_fix':
-            run_site_fixer(config=config)
-        elif args.command == 'site_clean':
-            run_site_clean(config=config)
-        else:
-            parser.print_help()
+        # 路由到相应函数（子命令为必填项，argparse已校验取值）
+        handler, _ = COMMANDS[args.command]
+        handler(config=config)
     
     except KeyboardInterrupt:
         logger.warning("\n程序被用户中断")
@@ -0,0 +1,74 @@
+"""
+处理器获取函数测试
+
+使用 config.ini.example 生成的真实配置调用各 get_*_handler，
+验证同一配置对象复用同一实例、清除缓存或更换配置后重新创建。
+
+Author: Qasim
+Version: 2.0
+Python: 3.11+
+Date: 2025-01-14
+"""
+
+import shutil
+from collections.abc import Callable, Iterator
+from configparser import ConfigParser
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# 处理器构造依赖的SDK未安装时跳过
+for _module in ('requests', 'pymysql', 'boto3', 'alibabacloud_oss_v2', 'Crypto', 'cryptography'):
+    pytest.importorskip(_module)
+
+from core import util_handler
+from core.handlers import (
+    clear_handlers,
+    get_api_handler,
+    get_database_handler,
+    get_oss_handler,
+    get_s3_handler,
+    get_site_handler,
+)
+
+GETTERS: list[Callable[..., Any]] = [
+    get_api_handler,
+    get_database_handler,
+    get_oss_handler,
+    get_s3_handler,
+    get_site_handler,
+]
+
+
+@pytest.fixture
+def config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[ConfigParser]:
+    """以 config.ini.example 作为 config.ini，通过 load_config() 加载真实配置"""
+    shutil.copy(util_handler.BASE_DIR / 'config.ini.example', tmp_path / 'config.ini')
+    monkeypatch.setattr(util_handler, 'BASE_DIR', tmp_path)
+    util_handler.clear_config_cache()
+    clear_handlers()
+    
+    yield util_handler.load_config()
+    
+    clear_handlers()
+    util_handler.clear_config_cache()
+
+
+@pytest.mark.parametrize('getter', GETTERS, ids=lambda getter: getter.__name__)
+def test_getter_reuses_instance_for_same_config(getter: Callable[..., Any], config: ConfigParser) -> None:
+    handler: Any = getter(config=config)
+    
+    assert getter(config=config) is handler
+    assert getter(config) is handler
+
+
+@pytest.mark.parametrize('getter', GETTERS, ids=lambda getter: getter.__name__)
+def test_getter_recreates_after_clear_or_reload(getter: Callable[..., Any], config: ConfigParser) -> None:
+    handler: Any = getter(config=config)
+    
+    clear_handlers()
+    assert getter(config=config) is not handler
+    
+    reloaded: ConfigParser = util_handler.load_config(force_reload=True)
+    assert getter(config=reloaded) is not getter(config=config)